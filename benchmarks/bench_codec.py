@@ -0,0 +1,84 @@
+"""请求构建与响应解码微基准
+
+对比旧路径（每次拼接查询文本、构建 payload 字典并整体 json.dumps，
+响应先解码为 str 再 json.loads）与预编译操作 + json_codec 快速路径。
+
+用法:
+    python benchmarks/bench_codec.py --iterations 100000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components import json_codec  # noqa: E402
+from components.operations import REGISTRY, PLAYER_STATUS_SELECTION  # noqa: E402
+
+RESPONSE = json.dumps({
+    "data": {
+        "player": {
+            "uuid": "069a79f4-44e9-4726-a5be-fca90e38aaf5",
+            "username": "Notch",
+            "ranks": ["CHAMP", "CREATOR"],
+            "status": {"online": True}
+        }
+    }
+}).encode("utf-8")
+
+UUID = "069a79f4-44e9-4726-a5be-fca90e38aaf5"
+
+
+def build_legacy() -> bytes:
+    query = """
+        query player($uuid: UUID!) {
+            player(uuid: $uuid) {
+                uuid
+                username
+                ranks
+                status {
+                    online
+                }
+            }
+        }
+        """
+    payload = {"query": query, "variables": {"uuid": UUID}}
+    return json.dumps(payload).encode("utf-8")
+
+
+OPERATION = REGISTRY.player_lookup("player", "uuid", "UUID!", PLAYER_STATUS_SELECTION)
+
+
+def build_precompiled() -> bytes:
+    return OPERATION.payload({"uuid": UUID})
+
+
+def decode_legacy():
+    return json.loads(RESPONSE.decode("utf-8"))
+
+
+def decode_fast():
+    return json_codec.loads(RESPONSE)
+
+
+def report(name: str, func, iterations: int) -> None:
+    seconds = min(timeit.repeat(func, number=iterations, repeat=5))
+    print(f"{name:<24} {seconds / iterations * 1e6:8.3f} us/op")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"json backend: {json_codec.BACKEND}")
+    report("build (legacy)", build_legacy, args.iterations)
+    report("build (precompiled)", build_precompiled, args.iterations)
+    report("decode (legacy)", decode_legacy, args.iterations)
+    report("decode (fast path)", decode_fast, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
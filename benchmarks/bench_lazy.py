@@ -0,0 +1,131 @@
+"""热缓存负载下延迟解析统计数据的效果
+
+缓存写入 N 个完整玩家（与 PlayerCache.put_payload 一样逐个 parse_player），
+然后按 Zipf 分布的名字执行一组命令的格式化（完整 /mcc、/mcc <游戏>、/fishing、/mccgames），
+分别用立即解析（eager）和延迟解析（lazy）的解析器，比较:
+
+    fill      写入缓存的 CPU 时间（us/玩家）和写入后模型的常驻字节（bytes/玩家，不含 payload）
+    workload  执行命令的 CPU 时间（us/命令，包括首次访问时的解析）和执行后模型的常驻字节
+
+用法:
+    python benchmarks/bench_lazy.py --players 5000 --commands 20000
+"""
+import argparse
+import bisect
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components.data_models import Player  # noqa: E402
+from components.game_processors import GameStatsProcessor  # noqa: E402
+from components.player_service import PlayerService  # noqa: E402
+from components.schema import compile_parsers  # noqa: E402
+from tools.stand_in_server import synthetic_player  # noqa: E402
+
+GAMES = ["global", "parkour", "skybattle", "tgttos", "hitw", "battlebox", "dynaball", "rocketspleef", "fishing"]
+
+# 与负载模拟器相同的命令比例（不含帮助和输错的命令）
+MIX = {"mcc": 35, "mcc_game": 25, "fishing": 15, "mccgames": 10}
+
+
+def make_commands(count: int, population: int, seed: int) -> List[Tuple[str, int, str]]:
+    rng = random.Random(seed)
+    weights = [1 / rank ** 1.1 for rank in range(1, population + 1)]
+    total = sum(weights)
+    cdf, acc = [], 0.0
+    for weight in weights:
+        acc += weight / total
+        cdf.append(acc)
+    scenarios, scenario_weights = list(MIX), list(MIX.values())
+    commands = []
+    for _ in range(count):
+        index = min(population - 1, bisect.bisect_left(cdf, rng.random()))
+        commands.append((rng.choices(scenarios, scenario_weights)[0], index, rng.choice(GAMES)))
+    return commands
+
+
+def execute(players: List[Player], commands: List[Tuple[str, int, str]], processor: GameStatsProcessor) -> None:
+    for scenario, index, game in commands:
+        player = players[index]
+        if scenario == "mcc":
+            processor.format_all_stats(player)
+        elif scenario == "mcc_game":
+            processor.format_player_overview(player)
+            processor.format_game_stats(player, game)
+        elif scenario == "fishing":
+            processor.format_player_overview(player)
+            processor.format_game_stats(player, "fishing")
+        else:
+            processor.get_available_games(player)
+
+
+def run(parse: Callable[[Dict[str, Any]], Player], payloads: List[Dict[str, Any]],
+        commands: List[Tuple[str, int, str]], processor: GameStatsProcessor, repeat: int) -> Dict[str, float]:
+    # CPU（不开 tracemalloc），取多轮最小值
+    fill_cpu = workload_cpu = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.process_time()
+        players = [parse(payload) for payload in payloads]
+        fill_cpu = min(fill_cpu, time.process_time() - start)
+        start = time.process_time()
+        execute(players, commands, processor)
+        workload_cpu = min(workload_cpu, time.process_time() - start)
+        del players
+
+    # 常驻内存
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        players = [parse(payload) for payload in payloads]
+        gc.collect()
+        fill_bytes = tracemalloc.get_traced_memory()[0] - base
+        execute(players, commands, processor)
+        gc.collect()
+        workload_bytes = tracemalloc.get_traced_memory()[0] - base
+    finally:
+        tracemalloc.stop()
+    del players
+    return {
+        "fill_us": fill_cpu / len(payloads) * 1e6,
+        "fill_bytes": fill_bytes / len(payloads),
+        "workload_us": workload_cpu / len(commands) * 1e6,
+        "workload_bytes": workload_bytes / len(payloads)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--commands", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = json.loads(json.dumps([synthetic_player(f"Hot{i:06d}") for i in range(args.players)]))
+    commands = make_commands(args.commands, args.players, args.seed)
+    processor = GameStatsProcessor(PlayerService(None), show_data_age=False)
+    modes = {
+        "eager": compile_parsers(Player, lazy=False)[Player],
+        "lazy": compile_parsers(Player)[Player]
+    }
+
+    print(f"players: {args.players}, commands: {args.commands}")
+    print(f"{'mode':<8} {'fill us/player':>15} {'fill B/player':>14} {'cmd us':>9} {'after B/player':>15} {'total ms':>9}")
+    for name, parse in modes.items():
+        result = run(parse, payloads, commands, processor, args.repeat)
+        total_ms = (result["fill_us"] * args.players + result["workload_us"] * args.commands) / 1000
+        print(f"{name:<8} {result['fill_us']:>15.2f} {result['fill_bytes']:>14,.0f} "
+              f"{result['workload_us']:>9.2f} {result['workload_bytes']:>15,.0f} {total_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""缓存玩家的内存占用基准
+
+用替身服务的合成数据（全部字段）测量每个玩家的常驻字节数（tracemalloc）:
+
+    payload     解码后的原始 JSON（缓存条目保留它用于合并部分数据和写入磁盘缓存）
+    player      DataParser.parse_player 生成的模型对象图，统计数据全部访问过（与立即解析相同）
+    player_lazy 同上，但延迟解析的统计数据从未访问（只保留原始子字典的引用）
+    snapshot    同一玩家刷新后的第二个快照（只有状态和全局统计变化）与第一个快照同时保留时的增量；
+                数据模型支持结构共享时，未变化的子对象直接复用
+    cache       PlayerCache.put_payload 写入的完整缓存条目（模型 + 条目本身，不含 payload），统计数据全部访问过
+
+用法:
+    python benchmarks/bench_memory.py --players 5000
+"""
+import argparse
+import copy
+import dataclasses
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components import data_models  # noqa: E402
+from components.cache import PlayerCache  # noqa: E402
+from components.data_models import DataParser  # noqa: E402
+from tools.stand_in_server import synthetic_player  # noqa: E402
+
+
+def make_payloads(count: int) -> List[Dict[str, Any]]:
+    # 经过一次 JSON 往返，字符串和字典与真实解码结果一样各自独立
+    return [json.loads(json.dumps(synthetic_player(f"Mem{i:06d}"))) for i in range(count)]
+
+
+def refreshed(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """模拟一次刷新：上线状态和全局统计变化，其余相同"""
+    payload = copy.deepcopy(payload)
+    payload["status"]["online"] = not payload["status"]["online"]
+    payload["statistics"]["global"]["played"] += 1
+    return payload
+
+
+def parsed(player):
+    """访问全部延迟字段，使统计数据解析完毕"""
+    stats = player.statistics
+    if stats is not None:
+        for spec in dataclasses.fields(stats):
+            getattr(stats, spec.name)
+    return player
+
+
+def retained(build: Callable[[], Any]) -> int:
+    """build 返回的对象常驻的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=5000)
+    args = parser.parse_args()
+    count = args.players
+
+    payloads = make_payloads(count)
+    updates = [refreshed(payload) for payload in payloads]
+    players = [parsed(DataParser.parse_player(payload)) for payload in payloads]
+    share = getattr(data_models, "share_structure", None)
+
+    def snapshots():
+        if share is None:
+            return [parsed(DataParser.parse_player(update)) for update in updates]
+        return [share(parsed(DataParser.parse_player(update)), old) for update, old in zip(updates, players)]
+
+    def cache():
+        player_cache = PlayerCache(ttl_seconds=300, max_entries=count)
+        for payload in payloads:
+            parsed(player_cache.put_payload(payload["uuid"], payload, frozenset({"statistics"})).player)
+        return player_cache
+
+    results = {
+        "payload": retained(lambda: make_payloads(count)),
+        "player": retained(lambda: [parsed(DataParser.parse_player(payload)) for payload in payloads]),
+        "player_lazy": retained(lambda: [DataParser.parse_player(payload) for payload in payloads]),
+        "snapshot": retained(snapshots),
+        "cache": retained(cache)
+    }
+
+    print(f"players: {count}, structural sharing: {'yes' if share else 'no'}")
+    print(f"{'measure':<12} {'bytes/player':>14}")
+    for name, size in results.items():
+        print(f"{name:<12} {size / count:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""生成式解析器与手写解析器的对比基准
+
+DataParser 的解析函数在导入时按数据模型字段表生成；这里保留原先手写的逐字段解析器，
+在完整玩家数据（替身服务的合成数据和 fixtures）上对比 parse_player 的耗时，并校验结果一致。
+生成式解析器分别测量立即解析全部统计（eager）和默认的延迟解析（lazy，统计数据首次访问时才解析）。
+
+用法:
+    python benchmarks/bench_parser.py --players 200 --number 20
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from types import MappingProxyType
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components.data_models import (  # noqa: E402
+    BattleBoxStats, Collections, CrownLevel, DataParser, DynaballStats, FishingStats, GlobalStats, HITWStats,
+    MCCPlusStatus, ParkourWarriorStats, Player, PlayerStatistics, PlayerStatus, RocketSpleefStats,
+    SkyBattleStats, Social, TGTTOSStats
+)
+from components.schema import compile_parsers  # noqa: E402
+from tools.stand_in_server import synthetic_player  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools", "fixtures", "players.json")
+
+
+class LegacyDataParser:
+    """手写的逐字段解析器（生成式解析器之前的实现）"""
+
+    @staticmethod
+    def parse_mcc_plus_status(data: Optional[Dict[str, Any]]) -> Optional[MCCPlusStatus]:
+        if not data:
+            return None
+        return MCCPlusStatus(
+            active=data.get('active', False),
+            tier=data.get('tier')
+        )
+
+    @staticmethod
+    def parse_crown_level(data: Optional[Dict[str, Any]]) -> Optional[CrownLevel]:
+        if not data:
+            return None
+        return CrownLevel(
+            level=data.get('level', 0),
+            progress=data.get('progress', 0.0)
+        )
+
+    @staticmethod
+    def parse_status(data: Optional[Dict[str, Any]]) -> Optional[PlayerStatus]:
+        if not data:
+            return None
+        return PlayerStatus(
+            first_login=data.get('firstLogin'),
+            last_login=data.get('lastLogin'),
+            online=data.get('online', False)
+        )
+
+    @staticmethod
+    def parse_collections(data: Optional[Dict[str, Any]]) -> Optional[Collections]:
+        if not data:
+            return None
+        return Collections(
+            currency=data.get('currency'),
+            cosmetics=data.get('cosmetics'),
+            trophies=data.get('trophies')
+        )
+
+    @staticmethod
+    def parse_social(data: Optional[Dict[str, Any]]) -> Optional[Social]:
+        if not data:
+            return None
+        return Social(
+            friends=data.get('friends'),
+            party=MappingProxyType(data['party']) if data.get('party') is not None else None
+        )
+
+    @staticmethod
+    def parse_global_stats(data: Optional[Dict[str, Any]]) -> Optional[GlobalStats]:
+        if not data:
+            return None
+        return GlobalStats(
+            wins=data.get('wins', 0),
+            played=data.get('played', 0),
+            playtime=data.get('playtime', 0)
+        )
+
+    @staticmethod
+    def parse_parkour_warrior_stats(data: Optional[Dict[str, Any]]) -> Optional[ParkourWarriorStats]:
+        if not data:
+            return None
+        return ParkourWarriorStats(
+            wins=data.get('wins', 0),
+            played=data.get('played', 0),
+            playtime=data.get('playtime', 0),
+            completions=data.get('completions', 0),
+            fastest_completion=data.get('fastestCompletion')
+        )
+
+    @staticmethod
+    def parse_sky_battle_stats(data: Optional[Dict[str, Any]]) -> Optional[SkyBattleStats]:
+        if not data:
+            return None
+        return SkyBattleStats(
+            wins=data.get('wins', 0),
+            played=data.get('played', 0),
+            playtime=data.get('playtime', 0),
+            kills=data.get('kills', 0),
+            deaths=data.get('deaths', 0)
+        )
+
+    @staticmethod
+    def parse_tgttos_stats(data: Optional[Dict[str, Any]]) -> Optional[TGTTOSStats]:
+        if not data:
+            return None
+        return TGTTOSStats(
+            wins=data.get('wins', 0),
+            played=data.get('played', 0),
+            playtime=data.get('playtime', 0),
+            finishes=data.get('finishes', 0),
+            fastest_completion=data.get('fastestCompletion')
+        )
+
+    @staticmethod
+    def parse_hitw_stats(data: Optional[Dict[str, Any]]) -> Optional[HITWStats]:
+        if not data:
+            return None
+        return HITWStats(
+            wins=data.get('wins', 0),
+            played=data.get('played', 0),
+            playtime=data.get('playtime', 0),
+            qualifications=data.get('qualifications', 0),
+            fastest_completion=data.get('fastestCompletion')
+        )
+
+    @staticmethod
+    def parse_battle_box_stats(data: Optional[Dict[str, Any]]) -> Optional[BattleBoxStats]:
+        if not data:
+            return None
+        return BattleBoxStats(
+            wins=data.get('wins', 0),
+            played=data.get('played', 0),
+            playtime=data.get('playtime', 0),
+            kills=data.get('kills', 0),
+            deaths=data.get('deaths', 0)
+        )
+
+    @staticmethod
+    def parse_dynaball_stats(data: Optional[Dict[str, Any]]) -> Optional[DynaballStats]:
+        if not data:
+            return None
+        return DynaballStats(
+            wins=data.get('wins', 0),
+            played=data.get('played', 0),
+            playtime=data.get('playtime', 0),
+            kills=data.get('kills', 0),
+            deaths=data.get('deaths', 0)
+        )
+
+    @staticmethod
+    def parse_rocket_spleef_stats(data: Optional[Dict[str, Any]]) -> Optional[RocketSpleefStats]:
+        if not data:
+            return None
+        return RocketSpleefStats(
+            wins=data.get('wins', 0),
+            played=data.get('played', 0),
+            playtime=data.get('playtime', 0),
+            kills=data.get('kills', 0),
+            deaths=data.get('deaths', 0)
+        )
+
+    @staticmethod
+    def parse_fishing_stats(data: Optional[Dict[str, Any]]) -> Optional[FishingStats]:
+        if not data:
+            return None
+        return FishingStats(
+            total=data.get('total', 0),
+            treasure=data.get('treasure', 0),
+            fish=data.get('fish', 0),
+            junk=data.get('junk', 0)
+        )
+
+    @staticmethod
+    def parse_statistics(data: Optional[Dict[str, Any]]) -> Optional[PlayerStatistics]:
+        if not data:
+            return None
+
+        global_stats = LegacyDataParser.parse_global_stats(data.get('global'))
+        if not global_stats:
+            return None
+
+        return PlayerStatistics(
+            global_stats=global_stats,
+            parkour_warrior=LegacyDataParser.parse_parkour_warrior_stats(data.get('parkourWarrior')),
+            sky_battle=LegacyDataParser.parse_sky_battle_stats(data.get('skyBattle')),
+            tgttos=LegacyDataParser.parse_tgttos_stats(data.get('tgttos')),
+            hitw=LegacyDataParser.parse_hitw_stats(data.get('hitw')),
+            battle_box=LegacyDataParser.parse_battle_box_stats(data.get('battleBox')),
+            dynaball=LegacyDataParser.parse_dynaball_stats(data.get('dynaball')),
+            rocket_spleef=LegacyDataParser.parse_rocket_spleef_stats(data.get('rocketSpleef')),
+            fishing=LegacyDataParser.parse_fishing_stats(data.get('fishing'))
+        )
+
+    @staticmethod
+    def parse_player(data: Dict[str, Any]) -> Optional[Player]:
+        """解析玩家数据"""
+        if not data or 'uuid' not in data:
+            return None
+
+        # 对于简化的查询，只解析基本字段
+        return Player(
+            uuid=data['uuid'],
+            username=data.get('username', ''),
+            ranks=tuple(data.get('ranks') or ()),
+            mcc_plus_status=LegacyDataParser.parse_mcc_plus_status(data.get('mccPlusStatus')) if 'mccPlusStatus' in data else None,
+            crown_level=LegacyDataParser.parse_crown_level(data.get('crownLevel')) if 'crownLevel' in data else None,
+            status=LegacyDataParser.parse_status(data.get('status')) if 'status' in data else None,
+            collections=LegacyDataParser.parse_collections(data.get('collections')) if 'collections' in data else None,
+            social=LegacyDataParser.parse_social(data.get('social')) if 'social' in data else None,
+            statistics=LegacyDataParser.parse_statistics(data.get('statistics')) if 'statistics' in data else None
+        )
+
+
+def load_payloads(count: int) -> list:
+    with open(FIXTURES, "r", encoding="utf-8") as f:
+        payloads = json.load(f)
+    payloads += [synthetic_player(f"Parse{i:05d}") for i in range(count)]
+    # JSON 往返，与真实解码结果一致
+    return json.loads(json.dumps(payloads))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=200, help="合成玩家数量")
+    parser.add_argument("--number", type=int, default=20, help="每轮解析全部玩家的次数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.players)
+    eager = compile_parsers(Player, lazy=False)[Player]
+    for payload in payloads:
+        expected = LegacyDataParser.parse_player(payload)
+        if expected != eager(payload) or expected != DataParser.parse_player(payload):
+            raise SystemExit(f"parser mismatch for {payload.get('username')}")
+
+    total = len(payloads) * args.number
+    results = {}
+    for name, parse in (("legacy", LegacyDataParser.parse_player), ("eager", eager), ("lazy", DataParser.parse_player)):
+        best = min(timeit.repeat(lambda: [parse(p) for p in payloads], number=args.number, repeat=args.repeat))
+        results[name] = best / total * 1e6
+
+    print(f"{len(payloads)} full players, results identical")
+    print(f"{'parser':<10} {'us/player':>10}")
+    for name, us in results.items():
+        print(f"{name:<10} {us:>10.2f}")
+    for name in ("eager", "lazy"):
+        print(f"{name + ' speedup':<14} {results['legacy'] / results[name]:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
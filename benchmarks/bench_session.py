@@ -0,0 +1,91 @@
+"""HTTP会话复用基准测试
+
+在本地启动一个GraphQL替身服务，对比“每次请求新建会话”（旧实现）
+与“长期复用连接池会话”（MCCIslandAPIClient）的单次请求延迟。
+
+用法:
+    python benchmarks/bench_session.py --requests 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components.api_client import MCCIslandAPIClient  # noqa: E402
+
+PLAYER_RESPONSE = {
+    "data": {
+        "playerByUsername": {
+            "uuid": "069a79f4-44e9-4726-a5be-fca90e38aaf5",
+            "username": "Notch",
+            "ranks": ["CHAMP"]
+        }
+    }
+}
+
+
+async def graphql_handler(request: web.Request) -> web.Response:
+    await request.read()
+    return web.json_response(PLAYER_RESPONSE)
+
+
+async def start_stand_in(host: str, port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_post("/graphql", graphql_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def per_request_session(client: MCCIslandAPIClient) -> None:
+    """旧实现：每次查询新建 ClientSession"""
+    payload = {"query": "query { playerByUsername(username: \"Notch\") { uuid } }", "variables": {}}
+    async with aiohttp.ClientSession() as session:
+        async with session.post(client.base_url, headers=client.headers, json=payload) as response:
+            await response.json()
+
+
+async def pooled_session(client: MCCIslandAPIClient) -> None:
+    await client.execute_query("query { playerByUsername(username: \"Notch\") { uuid } }")
+
+
+async def measure(name: str, func, client: MCCIslandAPIClient, requests: int) -> None:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await func(client)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<20} mean={statistics.mean(latencies):.3f}ms "
+          f"p50={statistics.median(latencies):.3f}ms p95={p95:.3f}ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+
+    runner = await start_stand_in("127.0.0.1", args.port)
+    client = MCCIslandAPIClient("benchmark-key", base_url=f"http://127.0.0.1:{args.port}/graphql")
+    try:
+        await measure("per-request session", per_request_session, client, args.requests)
+        await client.start()
+        await measure("pooled session", pooled_session, client, args.requests)
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""列式统计存储与遍历数据模型的对比基准
+
+对 N 个完整玩家计算天空大战胜率前 10 名、某个击杀数的百分位，
+以及某个 K/D 在已记录玩家中排前百分之几（回复中的排名标注）:
+
+    models   遍历 Player.statistics（已解析的数据模型）
+    store    StatsStore 的列运算（NumPy 或纯 Python 回退，见 backend）；排名查询使用有序数组索引
+
+用法:
+    python benchmarks/bench_stats_store.py --players 10000
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components.data_models import DataParser  # noqa: E402
+from components.stats_store import BACKEND, StatsStore  # noqa: E402
+from tools.stand_in_server import synthetic_player  # noqa: E402
+
+if BACKEND == "numpy":
+    import numpy as np
+
+
+def models_top_win_rate(players, k: int = 10):
+    rates = []
+    for player in players:
+        stats = player.statistics.sky_battle if player.statistics else None
+        if stats and stats.played:
+            rates.append((stats.wins / stats.played * 100, player.uuid))
+    return heapq.nlargest(k, rates)
+
+
+def models_percentile(players, kills: int) -> float:
+    values = [
+        player.statistics.sky_battle.kills for player in players
+        if player.statistics and player.statistics.sky_battle
+    ]
+    return sum(1 for value in values if value <= kills) / len(values) * 100
+
+
+def models_top_percent_kd(players, kd_ratio: float) -> float:
+    values = []
+    for player in players:
+        stats = player.statistics.sky_battle if player.statistics else None
+        if stats:
+            values.append(stats.kills / stats.deaths if stats.deaths else float(stats.kills))
+    return (sum(1 for value in values if value > kd_ratio) + 1) / len(values) * 100
+
+
+def store_top(store: StatsStore, game: str, metric: str, k: int = 10):
+    """列上取最高的 k 个值（NumPy 用 argpartition，回退为 heapq）"""
+    values = store.column(game, metric)
+    if BACKEND == "numpy":
+        values = values[~np.isnan(values)]
+        if len(values) > k:
+            values = values[np.argpartition(-values, k - 1)[:k]]
+        return sorted(values.tolist(), reverse=True)
+    return heapq.nlargest(k, (value for value in values if not math.isnan(value)))
+
+
+def store_percentile(store: StatsStore, game: str, metric: str, value: float) -> float:
+    """不高于 value 的比例（%），整列比较"""
+    values = store.column(game, metric)
+    if BACKEND == "numpy":
+        values = values[~np.isnan(values)]
+        return float(np.count_nonzero(values <= value)) / len(values) * 100
+    values = [v for v in values if not math.isnan(v)]
+    return sum(1 for v in values if v <= value) / len(values) * 100
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = json.loads(json.dumps([synthetic_player(f"Col{i:06d}") for i in range(args.players)]))
+    players = [DataParser.parse_player(payload) for payload in payloads]
+    store = StatsStore(max_players=args.players)
+    for payload in payloads:
+        store.update(payload["uuid"], payload["username"], payload["statistics"])
+
+    # 先访问一遍，使延迟解析的统计全部就绪，只比较计算本身
+    models_top_win_rate(players)
+    assert [rate for rate, _ in models_top_win_rate(players)] == store_top(store, "sky_battle", "win_rate")
+    assert models_percentile(players, 3000) == store_percentile(store, "sky_battle", "kills", 3000)
+    assert models_top_percent_kd(players, 2.0) == store.top_percent("sky_battle", "kd_ratio", 2.0)
+
+    cases = {
+        "top10 win_rate": (lambda: models_top_win_rate(players),
+                           lambda: store_top(store, "sky_battle", "win_rate")),
+        "percentile kills": (lambda: models_percentile(players, 3000),
+                             lambda: store_percentile(store, "sky_battle", "kills", 3000)),
+        "rank kd_ratio": (lambda: models_top_percent_kd(players, 2.0),
+                          lambda: store.top_percent("sky_battle", "kd_ratio", 2.0))
+    }
+    print(f"players: {args.players}, store backend: {BACKEND}")
+    print(f"{'query':<18} {'models ms':>10} {'store ms':>10} {'speedup':>8}")
+    for name, (models, columnar) in cases.items():
+        models_ms = min(timeit.repeat(models, number=args.number, repeat=3)) / args.number * 1000
+        store_ms = min(timeit.repeat(columnar, number=args.number, repeat=3)) / args.number * 1000
+        print(f"{name:<18} {models_ms:>10.3f} {store_ms:>10.3f} {models_ms / store_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""解析、格式化与完整命令延迟基准套件
+
+用例:
+    parse.*      DataParser.parse_player（小/完整统计数据）
+    format.*     GameStatsFormatter / GameStatsProcessor 各格式化方法
+    command.*    CommandRouter.route_command 端到端（本地替身服务），
+                 冷/热缓存 × 1/10/100 条并发命令
+
+每个用例输出 ops/sec、p50/p95/p99（微秒）和 tracemalloc 统计的单次操作峰值分配。
+结果可保存为 JSON 基线，之后与基线比较，超过阈值的退化会被标出并以非零状态退出。
+
+用法:
+    python benchmarks/bench_suite.py --save benchmarks/baselines/local.json
+    python benchmarks/bench_suite.py --compare benchmarks/baselines/local.json --threshold 0.15
+    python benchmarks/bench_suite.py --filter command.warm
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import FIXTURES, ROOT, BenchEvent, build_stack, summarize  # noqa: E402
+from components import json_codec  # noqa: E402
+from components.data_models import DataParser  # noqa: E402
+from components.game_processors import GameStatsFormatter, GameStatsProcessor  # noqa: E402
+from components.player_service import PlayerService  # noqa: E402
+from tools.stand_in_server import StandInConfig, StandInServer  # noqa: E402
+
+CONCURRENCY = (1, 10, 100)
+
+# 用于比较的指标：(名称, 数值越大越好)
+METRICS = (("ops_per_sec", True), ("p50_us", False), ("p95_us", False))
+
+
+def load_payloads() -> Dict[str, Dict[str, Any]]:
+    with open(FIXTURES, "r", encoding="utf-8") as f:
+        full = json.load(f)[0]
+    small = {key: full[key] for key in ("uuid", "username", "ranks", "status")}
+    return {"small": small, "full": full}
+
+
+# ---------------------------------------------------------------- 同步用例
+
+def run_sync(func: Callable[[], Any], iterations: int, alloc_samples: int) -> Dict[str, Any]:
+    for _ in range(min(100, iterations)):
+        func()
+
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(iterations):
+        t = clock()
+        func()
+        latencies.append(clock() - t)
+    result = summarize(latencies, clock() - start)
+    result["peak_alloc_kib"] = measure_alloc(func, alloc_samples)
+    return result
+
+
+def measure_alloc(func: Callable[[], Any], samples: int) -> float:
+    """单次调用期间的平均峰值分配（KiB）"""
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func()
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return round(total / samples / 1024, 2)
+
+
+def sync_cases(payloads: Dict[str, Dict[str, Any]]) -> Dict[str, Callable[[], Any]]:
+    # 格式化不需要API，服务只提供 calculate_* 等辅助方法
+    service = PlayerService(None)
+    formatter = GameStatsFormatter(service)
+    processor = GameStatsProcessor(service)
+    player = DataParser.parse_player(payloads["full"])
+    stats = player.statistics
+
+    return {
+        "parse.small": lambda: DataParser.parse_player(payloads["small"]),
+        "parse.full": lambda: DataParser.parse_player(payloads["full"]),
+        "format.global": lambda: formatter.format_global_stats(stats.global_stats),
+        "format.sky_battle": lambda: formatter.format_sky_battle_stats(stats.sky_battle),
+        "format.fishing": lambda: formatter.format_fishing_stats(stats.fishing),
+        "format.overview": lambda: processor.format_player_overview(player),
+        "format.all_stats": lambda: processor.format_all_stats(player)
+    }
+
+
+# ---------------------------------------------------------------- 端到端用例
+
+async def run_commands(stack, names: List[str], concurrency: int, rounds: int, cold: bool,
+                       alloc_rounds: int) -> Dict[str, Any]:
+    """每轮并发发出 concurrency 条 /mcc 命令"""
+    async def one(name: str) -> float:
+        t = time.perf_counter()
+        await stack.router.route_command(BenchEvent(f"/mcc {name}"), "mcc")
+        return time.perf_counter() - t
+
+    def batch(round_index: int) -> List[str]:
+        offset = (round_index * concurrency) % len(names)
+        return [names[(offset + i) % len(names)] for i in range(concurrency)]
+
+    # 热缓存：先把所有名字查询一遍
+    if not cold:
+        await asyncio.gather(*(one(name) for name in names))
+
+    latencies: List[float] = []
+    elapsed = 0.0
+    for r in range(rounds):
+        if cold:
+            stack.clear_caches()
+        start = time.perf_counter()
+        latencies.extend(await asyncio.gather(*(one(name) for name in batch(r))))
+        elapsed += time.perf_counter() - start
+    result = summarize(latencies, elapsed)
+
+    tracemalloc.start()
+    try:
+        total = 0
+        for r in range(alloc_rounds):
+            if cold:
+                stack.clear_caches()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            await asyncio.gather(*(one(name) for name in batch(r)))
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    result["peak_alloc_kib"] = round(total / max(1, alloc_rounds) / concurrency / 1024, 2)
+    return result
+
+
+async def command_cases(args, selected: Callable[[str], bool]) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    config = StandInConfig(latency=args.latency, seed=1)
+    async with StandInServer(config) as server:
+        stack = await build_stack(server.url)
+        try:
+            names = [f"Bench{i:04d}" for i in range(max(CONCURRENCY) * 2)]
+            for cold in (True, False):
+                for concurrency in CONCURRENCY:
+                    name = f"command.{'cold' if cold else 'warm'}.c{concurrency}"
+                    if not selected(name):
+                        continue
+                    rounds = max(3, args.command_ops // concurrency)
+                    results[name] = await run_commands(
+                        stack, names, concurrency, rounds, cold, args.alloc_rounds
+                    )
+                    print_row(name, results[name])
+        finally:
+            await stack.close()
+    return results
+
+
+# ---------------------------------------------------------------- 基线
+
+def print_row(name: str, result: Dict[str, Any]) -> None:
+    print(f"{name:<24} {result['ops_per_sec']:>12,.1f} {result['p50_us']:>10,.1f} "
+          f"{result['p95_us']:>10,.1f} {result['p99_us']:>10,.1f} {result['peak_alloc_kib']:>10,.2f}")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """返回超过阈值的退化描述"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in METRICS:
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append(f"{name}: {metric} {old:,.1f} -> {new:,.1f} ({change:+.1%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000, help="同步用例的迭代次数")
+    parser.add_argument("--command-ops", type=int, default=1000, help="每个端到端用例的命令总数")
+    parser.add_argument("--alloc-samples", type=int, default=200, help="同步用例分配统计的采样次数")
+    parser.add_argument("--alloc-rounds", type=int, default=3, help="端到端用例分配统计的轮数")
+    parser.add_argument("--latency", default="fixed:0", help="替身服务延迟分布")
+    parser.add_argument("--filter", default="", help="只运行名称包含此字符串的用例")
+    parser.add_argument("--save", help="把结果保存为 JSON 基线")
+    parser.add_argument("--compare", help="与 JSON 基线比较")
+    parser.add_argument("--threshold", type=float, default=0.15, help="退化阈值（比例）")
+    args = parser.parse_args()
+
+    def selected(name: str) -> bool:
+        return args.filter in name
+
+    print(f"json backend: {json_codec.BACKEND}, python {platform.python_version()}")
+    print(f"{'case':<24} {'ops/sec':>12} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10} {'alloc KiB':>10}")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, func in sync_cases(load_payloads()).items():
+        if selected(name):
+            results[name] = run_sync(func, args.iterations, args.alloc_samples)
+            print_row(name, results[name])
+    results.update(asyncio.run(command_cases(args, selected)))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "python": platform.python_version(),
+                    "json_backend": json_codec.BACKEND,
+                    "latency": args.latency,
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S")
+                },
+                "results": results
+            }, f, indent=2)
+        print(f"baseline saved to {os.path.relpath(args.save, ROOT)}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  REGRESSION {line}")
+            return 1
+        print(f"\nno regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""基准测试与负载模拟共用的工具
+
+- BenchEvent: 只实现插件用到的 AstrMessageEvent 接口（message_str、plain_result）
+- build_stack: 按 main.py 的方式组装 API客户端 → 玩家服务 → 命令路由，指向本地替身服务
+- summarize: 延迟列表 → ops/sec 与百分位
+
+依赖 AstrBot 运行环境（components 中的处理器会导入 astrbot.api）。
+"""
+import math
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from components.api_client import MCCIslandAPIClient  # noqa: E402
+from components.cache import NegativeCache, PlayerCache, UsernameIndex  # noqa: E402
+from components.command_handlers import CommandRouter  # noqa: E402
+from components.game_processors import GameStatsProcessor  # noqa: E402
+from components.player_service import PlayerService  # noqa: E402
+from components.rate_limiter import TokenBucketLimiter  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tools", "fixtures", "players.json")
+
+
+class BenchResult:
+    """plain_result 的返回值"""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class BenchEvent:
+    """最小的消息事件替身"""
+
+    __slots__ = ("message_str",)
+
+    def __init__(self, message_str: str):
+        self.message_str = message_str
+
+    def plain_result(self, text: str) -> BenchResult:
+        return BenchResult(text)
+
+
+@dataclass
+class Stack:
+    client: MCCIslandAPIClient
+    service: PlayerService
+    processor: GameStatsProcessor
+    router: CommandRouter
+
+    def clear_caches(self) -> None:
+        """清空所有内存缓存（冷缓存测试）"""
+        if self.service.cache is not None:
+            self.service.cache.clear()
+        self.service.username_index = UsernameIndex()
+        if self.service.negative_cache is not None:
+            self.service.negative_cache = NegativeCache()
+
+    async def close(self) -> None:
+        await self.service.close()
+        await self.client.close()
+
+
+async def build_stack(base_url: str, requests_per_minute: int = 1_000_000, burst_limit: int = 10_000,
+                      batching: bool = True, cache: bool = True,
+                      timeouts: Optional[Dict[str, float]] = None) -> Stack:
+    """组装与 main.py 相同的组件链；默认放宽限流，只测插件自身开销"""
+    client = MCCIslandAPIClient(
+        "benchmark-key",
+        rate_limiter=TokenBucketLimiter(requests_per_minute, burst_limit),
+        batching_config={"enabled": batching},
+        base_url=base_url
+    )
+    await client.start()
+    service = PlayerService(
+        client,
+        PlayerCache(300, 10_000) if cache else None,
+        UsernameIndex(),
+        NegativeCache() if cache else None
+    )
+    processor = GameStatsProcessor(service)
+    router = CommandRouter(service, processor, timeouts)
+    return Stack(client, service, processor, router)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """nearest-rank 百分位（输入需已排序）"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(len(sorted_values) * p / 100) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, Any]:
+    """延迟（秒）列表和总耗时 → 统计结果（微秒）"""
+    values = sorted(latencies)
+    return {
+        "ops": len(values),
+        "ops_per_sec": round(len(values) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_us": round(percentile(values, 50) * 1e6, 1),
+        "p95_us": round(percentile(values, 95) * 1e6, 1),
+        "p99_us": round(percentile(values, 99) * 1e6, 1)
+    }
@@ -1,6 +1,17 @@
 import aiohttp
-import json
-from typing import Dict, Any, Optional
+import asyncio
+import time
+from typing import Dict, Any, Optional, Tuple, Union
+from .rate_limiter import TokenBucketLimiter
+from .batcher import QueryBatcher
+from .resilience import CircuitBreaker, RetryPolicy
+from .operations import REGISTRY, NEXT_ROTATION, Operation, PLAYER_STATUS_SELECTION
+from .json_codec import loads
+from .hedging import HedgePolicy
+from .deadline import Deadline, record_timeout, within
+from .exceptions import QueryTimeoutError
+from .metrics import METRICS, query_trace_var
+from .structured_log import EventLogger
 
 # 尝试导入astrbot logger，如果失败则使用标准logging
 try:
@@ -9,99 +20,283 @@ except ImportError:
     import logging
     logger = logging.getLogger(__name__)
 
+log = EventLogger(logger)
+
+DEFAULT_BASE_URL = "https://api.mccisland.net/graphql"
+
+# 连接池默认参数，可通过配置文件的 http 节覆盖
+DEFAULT_HTTP_CONFIG = {
+    "pool_size": 100,
+    "per_host_limit": 20,
+    "keepalive_timeout": 30,
+    "dns_cache_ttl": 300,
+    "request_timeout": 15
+}
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（仅支持秒数格式）"""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
 class MCCIslandAPIClient:
     """MCC Island GraphQL API客户端 - 修复版本"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, http_config: Optional[Dict[str, Any]] = None,
+                 rate_limiter: Optional[TokenBucketLimiter] = None,
+                 batching_config: Optional[Dict[str, Any]] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 base_url: Optional[str] = None):
         self.api_key = api_key
-        self.base_url = "https://api.mccisland.net/graphql"
+        # 可指向本地替身服务（tools/stand_in_server.py）
+        self.base_url = base_url or DEFAULT_BASE_URL
         self.headers = {
             "X-API-Key": api_key,
             "Content-Type": "application/json",
             "User-Agent": "MCCIsland-AstrBot-Plugin/1.0.0"
         }
+        self.http_config = {**DEFAULT_HTTP_CONFIG, **(http_config or {})}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.hedge_policy = hedge_policy
+        
+        # 玩家查询微批处理：短时间窗口内的查询合并为一个别名查询
+        self.batcher: Optional[QueryBatcher] = None
+        if batching_config and batching_config.get("enabled"):
+            self.batcher = QueryBatcher(
+                self.execute_query,
+                batching_config.get("window_ms", 5),
+                batching_config.get("max_batch_size", 10)
+            )
     
-    async def execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """执行GraphQL查询"""
-        payload = {
-            "query": query,
-            "variables": variables or {}
-        }
+    async def start(self) -> None:
+        """创建长期复用的HTTP会话（连接池）"""
+        if self._session is not None and not self._session.closed:
+            return
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.base_url,
-                    headers=self.headers,
-                    json=payload
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if "errors" in data:
-                            logger.error(f"GraphQL errors: {data['errors']}")
-                            return {"error": "GraphQL查询出错", "details": data["errors"]}
-                        return data
-                    else:
-                        logger.error(f"API request failed with status {response.status}")
-                        return {"error": f"API请求失败，状态码: {response.status}"}
-        except Exception as e:
-            logger.error(f"API request exception: {str(e)}")
-            return {"error": f"请求异常: {str(e)}"}
+        connector = aiohttp.TCPConnector(
+            limit=self.http_config["pool_size"],
+            limit_per_host=self.http_config["per_host_limit"],
+            keepalive_timeout=self.http_config["keepalive_timeout"],
+            ttl_dns_cache=self.http_config["dns_cache_ttl"]
+        )
+        # 单次请求的兜底超时；命令级截止时间更短时以截止时间为准
+        timeout = aiohttp.ClientTimeout(total=self.http_config["request_timeout"])
+        self._session = aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=timeout)
+        logger.info(
+            f"HTTP session started (pool={self.http_config['pool_size']}, "
+            f"per_host={self.http_config['per_host_limit']})"
+        )
     
-    async def get_player_by_uuid(self, uuid: str) -> Dict[str, Any]:
-        """通过UUID获取玩家信息 - 仅基本字段"""
-        query = """
-        query player($uuid: UUID!) {
-            player(uuid: $uuid) {
-                uuid
-                username
-                ranks
-                status {
-                    online
-                }
-            }
-        }
-        """
-        variables = {"uuid": uuid}
-        return await self.execute_query(query, variables)
+    async def close(self) -> None:
+        """关闭HTTP会话并释放连接池"""
+        if self.batcher is not None:
+            await self.batcher.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("HTTP session closed")
+        self._session = None
     
-    async def get_player_by_username(self, username: str) -> Dict[str, Any]:
-        """通过用户名获取玩家信息 - 仅基本字段"""
-        query = """
-        query playerByUsername($username: String!) {
-            playerByUsername(username: $username) {
-                uuid
-                username
-                ranks
-                status {
-                    online
-                }
-            }
-        }
-        """
-        variables = {"username": username}
-        return await self.execute_query(query, variables)
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取会话，未启动时自动创建"""
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
     
-    async def get_player_basic_info(self, username: str) -> Dict[str, Any]:
-        """获取玩家基本信息 - 最简化版本"""
-        query = """
-        query playerByUsername($username: String!) {
-            playerByUsername(username: $username) {
-                uuid
-                username
-                ranks
+    async def execute_query(self, query: Union[str, Operation], variables: Optional[Dict[str, Any]] = None,
+                            allow_partial: bool = False, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """执行GraphQL查询
+        
+        query 可以是查询文本或预编译的 Operation（只需序列化变量）。
+        allow_partial 为True时，带有 errors 的响应原样返回，
+        由调用方（如批量查询）按 path 分拣部分结果。
+        deadline 为命令的截止时间：限流等待、每次请求和重试退避都不会超出剩余时间，
+        超时抛出 QueryTimeoutError。
+        """
+        operation = query if isinstance(query, Operation) else Operation(None, query)
+        body = operation.payload(variables)
+        
+        # 熔断：上游持续失败时直接返回不可用，不再等待超时
+        if not self.circuit_breaker.allow_request():
+            return {
+                "error": "MCC Island API暂时不可用",
+                "unavailable": True,
+                "retry_after": self.circuit_breaker.retry_after()
             }
-        }
+        
+        attempt = 0
+        while True:
+            # 限流：排队等待令牌，超过等待上限直接返回繁忙
+            if self.rate_limiter and not await self._acquire_token(deadline):
+                log.warning("rate_limit_rejected")
+                return {"error": "API繁忙，请稍后再试", "busy": True}
+            
+            if self.hedge_policy is not None and operation.read_only:
+                post = self._post_hedged(body, allow_partial)
+            else:
+                post = self._post(body, allow_partial)
+            try:
+                result, retriable, retry_after = await within(deadline, post, "http")
+            except (QueryTimeoutError, asyncio.CancelledError):
+                # 截止时间在 HTTP 阶段到期（上游挂起）也算一次失败，否则挂起的上游永远不会熔断，
+                # half_open 的探测请求也不会释放
+                if deadline is not None and deadline.timed_out_stage == "http":
+                    self.circuit_breaker.record_failure()
+                raise
+            if not retriable:
+                # 只有带数据的成功响应才算成功；鉴权失败、GraphQL 错误等不是上游故障，不计入熔断
+                if "error" not in result and result.get("data") is not None:
+                    self.circuit_breaker.record_success()
+                else:
+                    self.circuit_breaker.release_probe()
+                return result
+            
+            self.circuit_breaker.record_failure()
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            # 重试用尽、熔断或剩余时间不够再试一次：上游暂时不可用
+            if (delay is None or self.circuit_breaker.state == CircuitBreaker.OPEN
+                    or (deadline is not None and delay >= deadline.remaining())):
+                return {**result, "unavailable": True, "retry_after": self._retry_after(retry_after)}
+            
+            attempt += 1
+            log.warning("api_retry", attempt=attempt, delay=f"{delay:.2f}s")
+            await asyncio.sleep(delay)
+    
+    def _retry_after(self, retry_after: Optional[float]) -> float:
+        """重试用尽后建议用户等待的秒数"""
+        if self.circuit_breaker.state == CircuitBreaker.OPEN:
+            return self.circuit_breaker.retry_after()
+        return retry_after or 0.0
+    
+    async def _acquire_token(self, deadline: Optional[Deadline]) -> bool:
+        """获取限流令牌，等待时间不超过截止时间"""
+        start = time.perf_counter()
+        if deadline is None:
+            acquired = await self.rate_limiter.acquire()
+            METRICS.observe("rate_limit_wait", time.perf_counter() - start)
+            return acquired
+        
+        max_wait = self.rate_limiter.max_wait_seconds
+        remaining = deadline.remaining()
+        acquired = await self.rate_limiter.acquire(timeout=min(max_wait, remaining))
+        METRICS.observe("rate_limit_wait", time.perf_counter() - start)
+        if acquired:
+            return True
+        # 被截止时间而不是排队上限拒绝时，按超时处理
+        if remaining < max_wait:
+            raise record_timeout("rate_limit", deadline)
+        return False
+    
+    async def _post_hedged(self, body: bytes, allow_partial: bool) -> Tuple[Dict[str, Any], bool, Optional[float]]:
+        """发送请求，超过 p95 延迟未返回时发出对冲请求，取先成功返回者
+        
+        输掉的请求立即取消；被取消的主请求以取消时的耗时（延迟下限）计入 p95 窗口，
+        窗口因此不会漏掉慢的主请求。
         """
-        variables = {"username": username}
-        return await self.execute_query(query, variables)
+        policy = self.hedge_policy
+        policy.requests += 1
+        delay = policy.hedge_delay()
+        start = time.monotonic()
+        
+        primary = asyncio.ensure_future(self._post(body, allow_partial))
+        primary.add_done_callback(lambda _: policy.record_primary(time.monotonic() - start))
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                # 对冲请求只使用空闲令牌，不排队
+                if not done and policy.allow_hedge() and (
+                    self.rate_limiter is None or self.rate_limiter.try_acquire()
+                ):
+                    policy.hedges_sent += 1
+                    tasks.add(asyncio.ensure_future(self._post(body, allow_partial)))
+            
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = done.pop()
+                result = winner.result()
+                # 先返回的是可重试错误时，继续等待另一个请求
+                if not result[1] or not pending:
+                    break
+                tasks = pending
+            
+            if winner is not primary:
+                policy.record_hedge_win(time.monotonic() - start)
+            return result
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def _post(self, body: bytes, allow_partial: bool) -> Tuple[Dict[str, Any], bool, Optional[float]]:
+        """发送一次请求，返回 (结果, 是否可重试, Retry-After秒数)"""
+        try:
+            session = await self._get_session()
+            start = time.perf_counter()
+            async with session.post(self.base_url, data=body) as response:
+                if response.status == 200:
+                    raw = await response.read()
+                    decode_start = time.perf_counter()
+                    METRICS.observe("http", decode_start - start)
+                    METRICS.inc("bytes_received", amount=len(raw))
+                    data = loads(raw)
+                    METRICS.observe("json_decode", time.perf_counter() - decode_start)
+                    if "errors" in data and not allow_partial:
+                        # GraphQL校验/执行错误重试也不会成功
+                        METRICS.inc("upstream_errors", "graphql")
+                        log.error("graphql_errors", errors=data["errors"])
+                        return {"error": "GraphQL查询出错", "details": data["errors"]}, False, None
+                    return data, False, None
+                
+                METRICS.observe("http", time.perf_counter() - start)
+                METRICS.inc("upstream_errors", str(response.status))
+                log.error("api_http_error", status=response.status)
+                result = {"error": f"API请求失败，状态码: {response.status}"}
+                if response.status in (401, 403):
+                    result["auth_failed"] = True
+                if response.status == 429:
+                    return result, True, _parse_retry_after(response.headers.get("Retry-After"))
+                return result, response.status >= 500, None
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            METRICS.inc("upstream_errors", "connection")
+            log.error("api_connection_error", error=str(e) or type(e).__name__)
+            return {"error": f"请求异常: {str(e) or type(e).__name__}"}, True, None
+        except Exception as e:
+            log.error("api_request_exception", error=e)
+            return {"error": f"请求异常: {str(e)}"}, False, None
+    
+    async def get_player_by_uuid(self, uuid: str, selection: Optional[str] = None,
+                                 deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """通过UUID获取玩家信息 - 默认仅基本字段"""
+        return await self._lookup_player(
+            "player", "uuid", "UUID!", uuid, selection or PLAYER_STATUS_SELECTION, deadline
+        )
+    
+    async def get_player_by_username(self, username: str, selection: Optional[str] = None,
+                                     deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """通过用户名获取玩家信息 - 默认仅基本字段"""
+        return await self._lookup_player(
+            "playerByUsername", "username", "String!", username, selection or PLAYER_STATUS_SELECTION, deadline
+        )
+    
+    async def _lookup_player(self, field: str, arg_name: str, arg_type: str,
+                             value: str, selection: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """单个玩家查询，启用批量时合并进别名查询"""
+        # 追踪中的查询单独发送，HTTP 耗时和字节数才能归到这条命令
+        if self.batcher and query_trace_var.get() is None:
+            # 批次由多个调用方共享，超时只放弃本调用方的等待
+            return await within(
+                deadline, self.batcher.submit(field, arg_name, arg_type, value, selection), "batch"
+            )
+        
+        operation = REGISTRY.player_lookup(field, arg_name, arg_type, selection)
+        return await self.execute_query(operation, {arg_name: value}, deadline=deadline)
     
     async def get_next_rotation(self, rotation: str = "DAILY") -> Dict[str, Any]:
         """获取下次轮换时间"""
-        query = """
-        query nextRotation($rotation: Rotation!) {
-            nextRotation(rotation: $rotation)
-        }
-        """
-        variables = {"rotation": rotation}
-        return await self.execute_query(query, variables)
\ No newline at end of file
+        return await self.execute_query(NEXT_ROTATION, {"rotation": rotation})
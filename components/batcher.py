@@ -0,0 +1,154 @@
+import asyncio
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from .operations import Operation
+from .structured_log import EventLogger
+
+# 尝试导入astrbot logger，如果失败则使用标准logging
+try:
+    from astrbot.api import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+log = EventLogger(logger)
+
+# (根字段, 参数名, 参数类型, 参数值, 选择集)
+Lookup = Tuple[str, str, str, Any, str]
+ExecuteFunc = Callable[..., Awaitable[Dict[str, Any]]]
+
+@lru_cache(maxsize=256)
+def _batch_operation(shapes: Tuple[Tuple[str, str, str, str], ...]) -> Operation:
+    """按批次形状编译别名查询；形状相同的批次复用同一文档"""
+    declarations = []
+    selections = []
+    for index, (field, arg_name, arg_type, selection) in enumerate(shapes):
+        declarations.append(f"$v{index}: {arg_type}")
+        selections.append(f"p{index}: {field}({arg_name}: $v{index}) {{ {selection} }}")
+    query = f"query batchedLookups({', '.join(declarations)}) {{ {' '.join(selections)} }}"
+    return Operation("batchedLookups", query)
+
+class QueryBatcher:
+    """GraphQL 别名批量查询器
+
+    在短时间窗口内收集多个单字段查询，合并为一个别名查询文档
+    (p0: playerByUsername(...) p1: player(...))发送，再把每个别名的
+    结果和错误分发给对应的调用方。返回给调用方的结构与单独查询一致。
+    """
+
+    def __init__(self, execute: ExecuteFunc, window_ms: float = 5, max_batch_size: int = 10):
+        self.execute = execute
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: Dict[Lookup, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        # 统计计数
+        self.lookups = 0
+        self.batches = 0
+
+    async def submit(self, field: str, arg_name: str, arg_type: str, value: Any, selection: str) -> Dict[str, Any]:
+        """提交一个查询并等待所在批次返回"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        lookup = (field, arg_name, arg_type, value, selection)
+
+        # 同一批次内的相同查询共用一个别名
+        self._pending.setdefault(lookup, []).append(future)
+        self.lookups += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """发送当前批次"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        # 所有调用方都已放弃（超时取消）的查询不再发送
+        batch = {
+            lookup: futures for lookup, futures in batch.items()
+            if not all(future.done() for future in futures)
+        }
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _build_query(self, lookups: List[Lookup]) -> Tuple[Operation, Dict[str, Any]]:
+        """构建别名查询操作和变量"""
+        shapes = tuple((field, arg_name, arg_type, selection) for field, arg_name, arg_type, _, selection in lookups)
+        variables = {f"v{index}": lookup[3] for index, lookup in enumerate(lookups)}
+        return _batch_operation(shapes), variables
+
+    async def _send(self, batch: Dict[Lookup, List[asyncio.Future]]) -> None:
+        lookups = list(batch.keys())
+        self.batches += 1
+
+        try:
+            query, variables = self._build_query(lookups)
+            response = await self.execute(query, variables, allow_partial=True)
+        except asyncio.CancelledError:
+            for futures in batch.values():
+                for future in futures:
+                    future.cancel()
+            raise
+        except Exception as e:
+            log.error("batch_exception", lookups=len(lookups), error=e)
+            response = {"error": f"请求异常: {str(e)}"}
+
+        for index, lookup in enumerate(lookups):
+            result = self._result_for(response, f"p{index}", lookup[0])
+            for future in batch[lookup]:
+                if not future.done():
+                    future.set_result(result)
+
+    def _result_for(self, response: Dict[str, Any], alias: str, field: str) -> Dict[str, Any]:
+        """从批量响应中提取单个别名的结果"""
+        if "error" in response:
+            return dict(response)
+
+        # 没有 path 的错误（如文档校验失败）属于整个批次
+        errors = [
+            error for error in response.get("errors", [])
+            if not error.get("path") or error["path"][0] == alias
+        ]
+        if errors:
+            return {"error": "GraphQL查询出错", "details": errors}
+
+        data = response.get("data") or {}
+        return {"data": {field: data.get(alias)}}
+
+    async def close(self) -> None:
+        """取消未发送和发送中的批次"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for futures in self._pending.values():
+            for future in futures:
+                future.cancel()
+        self._pending = {}
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取批量统计"""
+        return {
+            "lookups": self.lookups,
+            "batches": self.batches,
+            "pending": len(self._pending),
+            "in_flight": len(self._tasks),
+            "avg_batch_size": self.lookups / self.batches if self.batches else 0.0
+        }
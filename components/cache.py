@@ -0,0 +1,276 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Hashable, Optional, Tuple
+from .data_models import Player, DataParser, share_structure
+from .query_builder import covers
+
+def merge_payloads(base: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """深度合并两份玩家原始数据，update 中的值优先"""
+    merged = dict(base)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_payloads(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+@dataclass
+class CacheEntry:
+    """缓存条目"""
+    player: Player
+    fetched_at: float
+    expires_at: float
+    payload: Dict[str, Any] = field(default_factory=dict)
+    fields: FrozenSet[str] = frozenset()
+    
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        """是否已超过TTL（但仍可作为陈旧数据返回）"""
+        return self.expires_at <= (time.time() if now is None else now)
+
+class PlayerCache:
+    """玩家数据缓存（TTL + LRU）
+
+    基于 OrderedDict 实现，读取时把条目移到末尾，超过 max_entries 时
+    从头部淘汰最久未使用的条目，均为 O(1) 操作。
+    超过TTL后条目在 max_stale_seconds 内仍可读取（stale-while-revalidate），
+    由调用方决定是否后台刷新。
+    每个条目记录已获取的字段集合，同一玩家的部分数据会合并到一个条目中。
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 1000, max_stale_seconds: float = 0):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.max_stale_seconds = max(0, max_stale_seconds)
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+
+        # 统计计数
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.partial_misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_entry(self, key: Hashable, fields: FrozenSet[str] = frozenset()) -> Optional[CacheEntry]:
+        """读取包含所需字段的缓存条目，包括仍在陈旧容忍期内的条目"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if not covers(entry.fields, fields):
+            self.partial_misses += 1
+            self.misses += 1
+            return None
+
+        now = time.time()
+        if entry.expires_at + self.max_stale_seconds <= now:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if entry.is_stale(now):
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def get(self, key: Hashable) -> Optional[Player]:
+        """读取缓存的玩家（可能是陈旧数据）"""
+        entry = self.get_entry(key)
+        return entry.player if entry else None
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """查看条目，不影响LRU顺序和统计"""
+        return self._entries.get(key)
+
+    def set(self, key: Hashable, player: Player, fetched_at: Optional[float] = None,
+            payload: Optional[Dict[str, Any]] = None, fields: FrozenSet[str] = frozenset()) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        if fetched_at is None:
+            fetched_at = time.time()
+        self._entries[key] = CacheEntry(
+            player, fetched_at, fetched_at + self.ttl_seconds, payload or {}, fields
+        )
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def put_payload(self, key: Hashable, payload: Dict[str, Any], fields: FrozenSet[str],
+                    fetched_at: Optional[float] = None) -> Optional[CacheEntry]:
+        """写入原始数据，与同一玩家未过期的部分数据合并后重新解析"""
+        existing = self._entries.get(key)
+        if existing is not None and not existing.is_stale() and not covers(fields, existing.fields):
+            # 以较早的获取时间为准，避免旧字段被当作新数据
+            payload = merge_payloads(existing.payload, payload)
+            fields = existing.fields | fields
+            fetched_at = existing.fetched_at
+
+        player = DataParser.parse_player(payload)
+        if player is None:
+            return None
+        if existing is not None:
+            # 刷新或合并时复用未变化的子对象
+            player = share_structure(player, existing.player)
+        self.set(key, player, fetched_at, payload, fields)
+        return self._entries[key]
+
+    def invalidate(self, key: Hashable) -> None:
+        """删除指定缓存"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "partial_misses": self.partial_misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+class NegativeCache:
+    """未找到玩家的短期缓存
+
+    只记录API明确返回“不存在”的查询，临时性错误不会写入。
+    使用独立的容量上限，大量无效名字不会挤掉正常的玩家缓存。
+    """
+
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 500):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+
+        # 统计计数
+        self.hits = 0
+        self.evictions = 0
+
+    def contains(self, key: Hashable) -> bool:
+        """查询是否在有效期内被确认不存在"""
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._entries[key]
+            return False
+        self.hits += 1
+        return True
+
+    def add(self, key: Hashable) -> None:
+        """记录不存在的查询"""
+        self._entries[key] = time.time() + self.ttl_seconds
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        """移除记录（玩家已能查到时）"""
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计"""
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "evictions": self.evictions
+        }
+
+class UsernameIndex:
+    """用户名 → UUID 解析索引
+
+    用户名不区分大小写；同一UUID只保留最新的用户名，
+    响应中出现改名时旧用户名的映射会被移除。
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._names: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._by_uuid: Dict[str, str] = {}
+
+        # 统计计数
+        self.hits = 0
+        self.misses = 0
+        self.renames = 0
+
+    def resolve(self, username: str) -> Optional[str]:
+        """解析用户名对应的UUID"""
+        name = username.lower()
+        item = self._names.get(name)
+        if item is None:
+            self.misses += 1
+            return None
+
+        uuid, expires_at = item
+        if expires_at <= time.time():
+            self._remove(name)
+            self.misses += 1
+            return None
+
+        self._names.move_to_end(name)
+        self.hits += 1
+        return uuid
+
+    def update(self, username: str, uuid: str) -> None:
+        """记录用户名与UUID的对应关系"""
+        name = username.lower()
+        uuid = uuid.lower()
+
+        # 玩家改名：移除旧用户名
+        old_name = self._by_uuid.get(uuid)
+        if old_name is not None and old_name != name:
+            self._names.pop(old_name, None)
+            self.renames += 1
+
+        # 用户名被其他玩家使用过：移除旧UUID的反向映射
+        previous = self._names.get(name)
+        if previous is not None and previous[0] != uuid:
+            self._by_uuid.pop(previous[0], None)
+
+        self._names[name] = (uuid, time.time() + self.ttl_seconds)
+        self._names.move_to_end(name)
+        self._by_uuid[uuid] = name
+
+        while len(self._names) > self.max_entries:
+            oldest, (oldest_uuid, _) = self._names.popitem(last=False)
+            if self._by_uuid.get(oldest_uuid) == oldest:
+                del self._by_uuid[oldest_uuid]
+
+    def _remove(self, name: str) -> None:
+        item = self._names.pop(name, None)
+        if item is not None and self._by_uuid.get(item[0]) == name:
+            del self._by_uuid[item[0]]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计"""
+        return {
+            "size": len(self._names),
+            "hits": self.hits,
+            "misses": self.misses,
+            "renames": self.renames
+        }
@@ -1,10 +1,24 @@
 import re
-from typing import Optional, List
+import time
+from typing import Dict, Optional, List
 from astrbot.api.event import AstrMessageEvent, MessageEventResult
 from astrbot.api import logger
 from .player_service import PlayerService
 from .game_processors import GameStatsProcessor
 from .data_models import Player
+from .exceptions import APIAuthError, APIBusyError, APIUnavailableError, QueryTimeoutError, UpstreamError
+from .query_builder import fields_for_command
+from .deadline import Deadline, within
+from .metrics import METRICS
+from .structured_log import EventLogger, new_trace_id, trace_id_var
+
+log = EventLogger(logger)
+
+BUSY_MESSAGE = "查询繁忙，请稍后再试"
+TIMEOUT_MESSAGE = "⏱️ 查询超时，请稍后再试"
+
+# 未配置时各命令的时间预算（秒）
+DEFAULT_COMMAND_TIMEOUT = 10.0
 
 class CommandHandler:
     """命令处理器基类"""
@@ -15,6 +29,12 @@ class CommandHandler:
     
     def parse_arguments(self, message: str, command: str) -> List[str]:
         """解析命令参数"""
+        start = time.perf_counter()
+        args = self._split_arguments(message, command)
+        METRICS.observe("parse_args", time.perf_counter() - start)
+        return args
+    
+    def _split_arguments(self, message: str, command: str) -> List[str]:
         # 移除命令前缀（支持有斜杠和无斜杠的情况）
         args_str = message.replace(f"/{command}", "").strip()
         
@@ -34,9 +54,42 @@ class CommandHandler:
     
     async def handle_error(self, event: AstrMessageEvent, error_msg: str) -> MessageEventResult:
         """处理错误消息"""
-        logger.error(error_msg)
+        log.info("error_reply", message=error_msg.split("\n", 1)[0])
         return event.plain_result(f"❌ {error_msg}")
     
+    async def handle_busy(self, event: AstrMessageEvent) -> MessageEventResult:
+        """本地限流排队已满"""
+        METRICS.inc("errors", "busy")
+        return await self.handle_error(event, BUSY_MESSAGE)
+    
+    async def handle_exception(self, event: AstrMessageEvent, error_msg: str) -> MessageEventResult:
+        """处理未预期的异常"""
+        METRICS.inc("errors", "exception")
+        log.error("command_exception", message=error_msg)
+        return await self.handle_error(event, error_msg)
+    
+    async def handle_unavailable(self, event: AstrMessageEvent, error: APIUnavailableError) -> MessageEventResult:
+        """上游API熔断时立即回复，不等待超时"""
+        METRICS.inc("errors", "unavailable")
+        message = "MCC Island API暂时不可用"
+        if error.retry_after > 0:
+            message += f"，请在约 {int(error.retry_after) + 1} 秒后重试"
+        return await self.handle_error(event, message)
+    
+    async def handle_upstream_error(self, event: AstrMessageEvent, error: UpstreamError) -> MessageEventResult:
+        """上游API返回错误：提示API问题，而不是“未找到玩家”"""
+        if isinstance(error, APIAuthError):
+            METRICS.inc("errors", "auth")
+            return await self.handle_error(event, "MCC Island API拒绝了请求：API密钥无效或未配置，请检查 config.json")
+        METRICS.inc("errors", "upstream")
+        return await self.handle_error(event, "MCC Island API请求失败，请稍后再试")
+    
+    async def handle_timeout(self, event: AstrMessageEvent, error: QueryTimeoutError) -> MessageEventResult:
+        """超过命令时间预算时回复超时"""
+        METRICS.inc("errors", "timeout")
+        log.warning("command_timeout", stage=error.stage)
+        return event.plain_result(TIMEOUT_MESSAGE)
+    
     async def handle_success(self, event: AstrMessageEvent, success_msg: str) -> MessageEventResult:
         """处理成功消息"""
         return event.plain_result(success_msg)
@@ -44,9 +97,11 @@ class CommandHandler:
 class PlayerQueryHandler(CommandHandler):
     """玩家查询命令处理器"""
     
-    async def handle_player_query(self, event: AstrMessageEvent) -> MessageEventResult:
+    async def handle_player_query(self, event: AstrMessageEvent,
+                                  deadline: Optional[Deadline] = None,
+                                  command: str = "mcc") -> MessageEventResult:
         """处理玩家查询命令"""
-        args = self.parse_arguments(event.message_str, "mcc")
+        args = self.parse_arguments(event.message_str, command)
         
         if not args:
             help_text = """🎮 **MCC Island 玩家查询帮助**
@@ -76,21 +131,34 @@ class PlayerQueryHandler(CommandHandler):
         game_filter = args[1].lower() if len(args) > 1 else None
         
         try:
-            # 获取玩家信息
-            player = await self.player_service.get_player(player_identifier)
+            # 获取玩家信息（只请求该查询需要的字段）
+            player = await self.player_service.get_player(
+                player_identifier, fields_for_command("mcc", game_filter), deadline
+            )
             
             if not player:
-                error_msg = f"未找到玩家: {player_identifier}\n\n💡 **可能的原因:**\n• API密钥未配置或无效\n• 玩家名称拼写错误\n• 玩家在MCC Island中不存在\n\n📖 请查看 API_SETUP.md 获取配置帮助"
+                error_msg = f"未找到玩家: {player_identifier}\n\n💡 **可能的原因:**\n• 玩家名称拼写错误\n• 玩家在MCC Island中不存在\n\n📖 请查看 API_SETUP.md 获取配置帮助"
                 return await self.handle_error(event, error_msg)
             
             # 根据参数返回不同的信息
+            start = time.perf_counter()
             if game_filter:
-                return await self._handle_game_specific_query(event, player, game_filter)
+                result = await self._handle_game_specific_query(event, player, game_filter)
             else:
-                return await self._handle_full_player_query(event, player)
+                result = await self._handle_full_player_query(event, player)
+            METRICS.observe("format", time.perf_counter() - start)
+            return result
                 
+        except APIBusyError:
+            return await self.handle_busy(event)
+        except APIUnavailableError as e:
+            return await self.handle_unavailable(event, e)
+        except UpstreamError as e:
+            return await self.handle_upstream_error(event, e)
+        except QueryTimeoutError as e:
+            return await self.handle_timeout(event, e)
         except Exception as e:
-            return await self.handle_error(event, f"查询玩家信息时出错: {str(e)}")
+            return await self.handle_exception(event, f"查询玩家信息时出错: {str(e)}")
     
     async def _handle_game_specific_query(self, event: AstrMessageEvent, player: Player, game: str) -> MessageEventResult:
         """处理特定游戏查询"""
@@ -137,9 +205,11 @@ class PlayerQueryHandler(CommandHandler):
 class FishingQueryHandler(CommandHandler):
     """钓鱼专用查询处理器"""
     
-    async def handle_fishing_query(self, event: AstrMessageEvent) -> MessageEventResult:
+    async def handle_fishing_query(self, event: AstrMessageEvent,
+                                   deadline: Optional[Deadline] = None,
+                                   command: str = "fishing") -> MessageEventResult:
         """处理钓鱼查询命令"""
-        args = self.parse_arguments(event.message_str, "fishing")
+        args = self.parse_arguments(event.message_str, command)
         
         if not args:
             help_text = """🎣 **MCC Island 钓鱼统计查询**
@@ -156,17 +226,19 @@ class FishingQueryHandler(CommandHandler):
         
         try:
             # 获取玩家信息
-            player = await self.player_service.get_player(player_identifier)
+            player = await self.player_service.get_player(player_identifier, fields_for_command("fishing"), deadline)
             
             if not player:
-                error_msg = f"未找到玩家: {player_identifier}\n\n💡 **可能的原因:**\n• API密钥未配置或无效\n• 玩家名称拼写错误\n• 玩家在MCC Island中不存在\n\n📖 请查看 API_SETUP.md 获取配置帮助"
+                error_msg = f"未找到玩家: {player_identifier}\n\n💡 **可能的原因:**\n• 玩家名称拼写错误\n• 玩家在MCC Island中不存在\n\n📖 请查看 API_SETUP.md 获取配置帮助"
                 return await self.handle_error(event, error_msg)
             
             # 获取玩家概览
+            start = time.perf_counter()
             overview = self.game_processor.format_player_overview(player)
             
             # 获取钓鱼统计
             fishing_stats = self.game_processor.format_game_stats(player, "fishing")
+            METRICS.observe("format", time.perf_counter() - start)
             
             if not fishing_stats:
                 return await self.handle_error(event, f"玩家 {player.username} 没有钓鱼数据")
@@ -174,15 +246,25 @@ class FishingQueryHandler(CommandHandler):
             result = f"{overview}\n\n{fishing_stats}"
             return await self.handle_success(event, result)
             
+        except APIBusyError:
+            return await self.handle_busy(event)
+        except APIUnavailableError as e:
+            return await self.handle_unavailable(event, e)
+        except UpstreamError as e:
+            return await self.handle_upstream_error(event, e)
+        except QueryTimeoutError as e:
+            return await self.handle_timeout(event, e)
         except Exception as e:
-            return await self.handle_error(event, f"查询钓鱼统计时出错: {str(e)}")
+            return await self.handle_exception(event, f"查询钓鱼统计时出错: {str(e)}")
 
 class GameListHandler(CommandHandler):
     """游戏列表查询处理器"""
     
-    async def handle_games_list(self, event: AstrMessageEvent) -> MessageEventResult:
+    async def handle_games_list(self, event: AstrMessageEvent,
+                                deadline: Optional[Deadline] = None,
+                                command: str = "mccgames") -> MessageEventResult:
         """处理游戏列表查询"""
-        args = self.parse_arguments(event.message_str, "mccgames")
+        args = self.parse_arguments(event.message_str, command)
         
         if not args:
             # 显示支持的游戏类型列表
@@ -206,13 +288,15 @@ class GameListHandler(CommandHandler):
         
         try:
             # 获取玩家信息
-            player = await self.player_service.get_player(player_identifier)
+            player = await self.player_service.get_player(player_identifier, fields_for_command("mccgames"), deadline)
             
             if not player:
                 return await self.handle_error(event, f"未找到玩家: {player_identifier}")
             
             # 获取可用游戏
+            start = time.perf_counter()
             available_games = self.game_processor.get_available_games(player)
+            METRICS.observe("format", time.perf_counter() - start)
             
             if not available_games:
                 return await self.handle_error(event, f"玩家 {player.username} 暂无游戏统计数据")
@@ -228,28 +312,66 @@ class GameListHandler(CommandHandler):
             
             return await self.handle_success(event, result)
             
+        except APIBusyError:
+            return await self.handle_busy(event)
+        except APIUnavailableError as e:
+            return await self.handle_unavailable(event, e)
+        except UpstreamError as e:
+            return await self.handle_upstream_error(event, e)
+        except QueryTimeoutError as e:
+            return await self.handle_timeout(event, e)
         except Exception as e:
-            return await self.handle_error(event, f"查询玩家游戏列表时出错: {str(e)}")
+            return await self.handle_exception(event, f"查询玩家游戏列表时出错: {str(e)}")
 
 class CommandRouter:
     """命令路由器"""
     
-    def __init__(self, player_service: PlayerService, game_processor: GameStatsProcessor):
+    def __init__(self, player_service: PlayerService, game_processor: GameStatsProcessor,
+                 timeout_config: Optional[Dict[str, float]] = None):
         self.player_query_handler = PlayerQueryHandler(player_service, game_processor)
         self.fishing_query_handler = FishingQueryHandler(player_service, game_processor)
         self.games_list_handler = GameListHandler(player_service, game_processor)
+        self.timeout_config = timeout_config or {}
     
-    async def route_command(self, event: AstrMessageEvent, command: str) -> MessageEventResult:
-        """路由命令到对应的处理器"""
+    def command_timeout(self, command: str) -> float:
+        """命令的时间预算（秒）"""
+        return self.timeout_config.get(command, self.timeout_config.get("default", DEFAULT_COMMAND_TIMEOUT))
+    
+    async def route_command(self, event: AstrMessageEvent, command: str,
+                            deadline: Optional[Deadline] = None,
+                            invoked_as: Optional[str] = None) -> MessageEventResult:
+        """路由命令到对应的处理器
+        
+        每条命令在入口获得一个截止时间，并沿 处理器 → 玩家服务 → API客户端 传递。
+        invoked_as 为消息中实际使用的命令名（如 /mccdebug 以 mcc 处理），用于解析参数。
+        """
+        if deadline is None:
+            deadline = Deadline(self.command_timeout(command))
+        
+        METRICS.inc("requests", command)
+        start = time.perf_counter()
+        # 本条命令的追踪ID，随 contextvars 传到服务层和客户端的日志
+        trace_token = trace_id_var.set(new_trace_id())
+        invoked_as = invoked_as or command
         try:
             if command == "mcc":
-                return await self.player_query_handler.handle_player_query(event)
+                handler = self.player_query_handler.handle_player_query(event, deadline, invoked_as)
             elif command == "fishing":
-                return await self.fishing_query_handler.handle_fishing_query(event)
+                handler = self.fishing_query_handler.handle_fishing_query(event, deadline, invoked_as)
             elif command == "mccgames":
-                return await self.games_list_handler.handle_games_list(event)
+                handler = self.games_list_handler.handle_games_list(event, deadline, invoked_as)
             else:
                 return event.plain_result(f"❌ 未知命令: {command}")
+            # 兜底：处理器本身超出预算时取消并回复超时
+            return await within(deadline, handler, "command")
+        except QueryTimeoutError as e:
+            METRICS.inc("errors", "timeout")
+            log.warning("command_timeout", command=command, stage=e.stage)
+            return event.plain_result(TIMEOUT_MESSAGE)
         except Exception as e:
-            logger.error(f"Command routing error: {str(e)}")
-            return event.plain_result(f"❌ 处理命令时出错: {str(e)}")
\ No newline at end of file
+            METRICS.inc("errors", "exception")
+            log.error("command_routing_error", command=command, error=e)
+            return event.plain_result(f"❌ 处理命令时出错: {str(e)}")
+        finally:
+            METRICS.observe("command", time.perf_counter() - start)
+            trace_id_var.reset(trace_token)
\ No newline at end of file
@@ -17,14 +17,86 @@ class ConfigManager:
         self.config = {}
         self.default_config = {
             "api_key": "",
+            "api_base_url": "",
             "rate_limit": {
                 "requests_per_minute": 60,
-                "burst_limit": 10
+                "burst_limit": 10,
+                "max_wait_seconds": 10
             },
             "cache": {
                 "enabled": True,
                 "ttl_seconds": 300,
-                "max_entries": 1000
+                "max_entries": 1000,
+                "username_ttl_seconds": 3600,
+                "max_stale_seconds": 600,
+                "negative_ttl_seconds": 60,
+                "negative_max_entries": 500,
+                "persistent": {
+                    "enabled": False,
+                    "path": "player_cache.db",
+                    "ttl_seconds": 3600,
+                    "flush_interval_seconds": 2,
+                    "batch_size": 100,
+                    "max_pending": 10000
+                }
+            },
+            "http": {
+                "pool_size": 100,
+                "per_host_limit": 20,
+                "keepalive_timeout": 30,
+                "dns_cache_ttl": 300,
+                "request_timeout": 15
+            },
+            "retry": {
+                "max_retries": 2,
+                "base_delay_seconds": 0.5,
+                "max_delay_seconds": 8
+            },
+            "circuit_breaker": {
+                "failure_threshold": 5,
+                "recovery_timeout_seconds": 30
+            },
+            "hedging": {
+                "enabled": False,
+                "percentile": 95,
+                "min_delay_ms": 50,
+                "max_hedge_ratio": 0.1,
+                "min_samples": 20
+            },
+            "batching": {
+                "enabled": True,
+                "window_ms": 5,
+                "max_batch_size": 10
+            },
+            "timeouts": {
+                "default": 10,
+                "mcc": 10,
+                "fishing": 10,
+                "mccgames": 8
+            },
+            "metrics": {
+                "enabled": True,
+                "export_file": "",
+                "export_interval_seconds": 15,
+                "http_host": "127.0.0.1",
+                "http_port": 0
+            },
+            "stats_store": {
+                "enabled": True,
+                "max_players": 10000,
+                "min_population": 20
+            },
+            "logging": {
+                "default_sample_rate": 1.0,
+                "sample_rates": {
+                    "player_query": 0.1,
+                    "player_fetched": 0.1,
+                    "player_not_found": 0.1,
+                    "invalid_identifier": 0.1,
+                    "error_reply": 0.1
+                },
+                "error_burst": 5,
+                "error_interval_seconds": 60
             },
             "features": {
                 "enable_fishing_command": True,
@@ -34,7 +106,9 @@ class ConfigManager:
             "display": {
                 "max_message_length": 2000,
                 "use_emojis": True,
-                "show_uuid": True
+                "show_uuid": True,
+                "show_data_age": True,
+                "show_percentiles": True
             }
         }
     
@@ -105,10 +179,18 @@ class ConfigManager:
                 logger.error("requests_per_minute必须大于0")
                 return False
             
+            if self.config["rate_limit"]["burst_limit"] <= 0:
+                logger.error("burst_limit必须大于0")
+                return False
+            
             if self.config["cache"]["ttl_seconds"] <= 0:
                 logger.error("ttl_seconds必须大于0")
                 return False
             
+            if self.config["cache"]["max_entries"] <= 0:
+                logger.error("max_entries必须大于0")
+                return False
+            
             if self.config["display"]["max_message_length"] <= 0:
                 logger.error("max_message_length必须大于0")
                 return False
@@ -160,6 +242,10 @@ class ConfigManager:
         """获取API密钥"""
         return self.get("api_key", "")
     
+    def get_api_base_url(self) -> Optional[str]:
+        """获取API地址（为空时使用官方地址）"""
+        return self.get("api_base_url") or None
+    
     def is_feature_enabled(self, feature: str) -> bool:
         """检查功能是否启用"""
         return self.get(f"features.{feature}", False)
@@ -172,6 +258,42 @@ class ConfigManager:
         """获取缓存配置"""
         return self.get("cache", self.default_config["cache"])
     
+    def get_http_config(self) -> Dict[str, Any]:
+        """获取HTTP连接池配置"""
+        return self.get("http", self.default_config["http"])
+    
+    def get_retry_config(self) -> Dict[str, Any]:
+        """获取重试配置"""
+        return self.get("retry", self.default_config["retry"])
+    
+    def get_circuit_breaker_config(self) -> Dict[str, Any]:
+        """获取熔断器配置"""
+        return self.get("circuit_breaker", self.default_config["circuit_breaker"])
+    
+    def get_hedging_config(self) -> Dict[str, Any]:
+        """获取对冲请求配置"""
+        return self.get("hedging", self.default_config["hedging"])
+    
+    def get_batching_config(self) -> Dict[str, Any]:
+        """获取批量查询配置"""
+        return self.get("batching", self.default_config["batching"])
+    
+    def get_timeout_config(self) -> Dict[str, float]:
+        """获取各命令的时间预算配置"""
+        return self.get("timeouts", self.default_config["timeouts"])
+    
+    def get_metrics_config(self) -> Dict[str, Any]:
+        """获取指标导出配置"""
+        return self.get("metrics", self.default_config["metrics"])
+    
+    def get_stats_store_config(self) -> Dict[str, Any]:
+        """获取列式统计存储配置"""
+        return self.get("stats_store", self.default_config["stats_store"])
+    
+    def get_logging_config(self) -> Dict[str, Any]:
+        """获取日志采样与限流配置"""
+        return self.get("logging", self.default_config["logging"])
+    
     def get_display_config(self) -> Dict[str, Any]:
         """获取显示配置"""
         return self.get("display", self.default_config["display"])
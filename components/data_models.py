@@ -1,47 +1,56 @@
-from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from dataclasses import dataclass, field, fields, is_dataclass
+from typing import Optional, Any, Mapping, Tuple, TypeVar
 from datetime import datetime
+from .schema import compile_parsers, copy_model, is_loaded, model_type
 
-@dataclass
+T = TypeVar("T")
+
+# 数据模型均为不可变的 slots 类：没有实例 __dict__，缓存条目之间可以安全地共享子对象
+
+# 延迟解析：保留原始子字典，首次访问时解析并记住结果
+LAZY = {"lazy": True}
+
+@dataclass(frozen=True, slots=True)
 class MCCPlusStatus:
     """MCC Plus状态"""
     active: bool
     tier: Optional[str] = None
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CrownLevel:
     """皇冠等级"""
     level: int
     progress: float
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PlayerStatus:
     """玩家状态"""
     first_login: Optional[str]
     last_login: Optional[str]
     online: bool
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Collections:
     """收藏品"""
     currency: Optional[int]
     cosmetics: Optional[int]
     trophies: Optional[int]
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Social:
     """社交信息"""
     friends: Optional[int]
-    party: Optional[Dict[str, Any]]
+    # 只读视图；内容来自API，不参与哈希
+    party: Optional[Mapping[str, Any]] = field(hash=False)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GlobalStats:
     """全局统计"""
     wins: int
     played: int
     playtime: int
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ParkourWarriorStats:
     """跑酷勇士统计"""
     wins: int
@@ -50,7 +59,7 @@ class ParkourWarriorStats:
     completions: int
     fastest_completion: Optional[int]
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SkyBattleStats:
     """天空大战统计"""
     wins: int
@@ -59,7 +68,7 @@ class SkyBattleStats:
     kills: int
     deaths: int
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TGTTOSStats:
     """TGTTOS统计"""
     wins: int
@@ -68,7 +77,7 @@ class TGTTOSStats:
     finishes: int
     fastest_completion: Optional[int]
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class HITWStats:
     """HITW统计"""
     wins: int
@@ -77,7 +86,7 @@ class HITWStats:
     qualifications: int
     fastest_completion: Optional[int]
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BattleBoxStats:
     """战斗盒子统计"""
     wins: int
@@ -86,7 +95,7 @@ class BattleBoxStats:
     kills: int
     deaths: int
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DynaballStats:
     """炸弹球统计"""
     wins: int
@@ -95,7 +104,7 @@ class DynaballStats:
     kills: int
     deaths: int
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RocketSpleefStats:
     """火箭铲雪统计"""
     wins: int
@@ -104,7 +113,7 @@ class RocketSpleefStats:
     kills: int
     deaths: int
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FishingStats:
     """钓鱼统计"""
     total: int
@@ -112,223 +121,84 @@ class FishingStats:
     fish: int
     junk: int
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PlayerStatistics:
-    """玩家统计数据"""
-    global_stats: GlobalStats
-    parkour_warrior: Optional[ParkourWarriorStats] = None
-    sky_battle: Optional[SkyBattleStats] = None
-    tgttos: Optional[TGTTOSStats] = None
-    hitw: Optional[HITWStats] = None
-    battle_box: Optional[BattleBoxStats] = None
-    dynaball: Optional[DynaballStats] = None
-    rocket_spleef: Optional[RocketSpleefStats] = None
-    fishing: Optional[FishingStats] = None
-
-@dataclass
+    """玩家统计数据（各游戏按需解析）"""
+    global_stats: GlobalStats = field(metadata={"graphql": "global", **LAZY})
+    parkour_warrior: Optional[ParkourWarriorStats] = field(default=None, metadata=LAZY)
+    sky_battle: Optional[SkyBattleStats] = field(default=None, metadata=LAZY)
+    tgttos: Optional[TGTTOSStats] = field(default=None, metadata=LAZY)
+    hitw: Optional[HITWStats] = field(default=None, metadata=LAZY)
+    battle_box: Optional[BattleBoxStats] = field(default=None, metadata=LAZY)
+    dynaball: Optional[DynaballStats] = field(default=None, metadata=LAZY)
+    rocket_spleef: Optional[RocketSpleefStats] = field(default=None, metadata=LAZY)
+    fishing: Optional[FishingStats] = field(default=None, metadata=LAZY)
+
+@dataclass(frozen=True, slots=True)
 class Player:
     """玩家信息"""
-    uuid: str
+    uuid: str = field(metadata={"required": True})
     username: str
-    ranks: list[str]
+    ranks: Tuple[str, ...]
     mcc_plus_status: Optional[MCCPlusStatus] = None
     crown_level: Optional[CrownLevel] = None
     status: Optional[PlayerStatus] = None
     collections: Optional[Collections] = None
     social: Optional[Social] = None
-    statistics: Optional[PlayerStatistics] = None
+    statistics: Optional[PlayerStatistics] = field(default=None, metadata=LAZY)
+
+def share_structure(new: T, old: Optional[T]) -> T:
+    """结构共享：new 中与 old 相等的子对象改用 old 中的实例
+
+    用于同一玩家的刷新或合并：未变化的部分（如没玩过的游戏、段位列表）
+    只保留一份，旧实例不可变，共享是安全的。尚未解析的延迟字段不比较，保持未解析。
+    """
+    if old is None or model_type(new) is not model_type(old):
+        return new
+    changes = {}
+    all_shared = True
+    for model_field in fields(new):
+        name = model_field.name
+        if not (is_loaded(new, name) and is_loaded(old, name)):
+            all_shared = False
+            continue
+        value = getattr(new, name)
+        previous = getattr(old, name)
+        if value is previous:
+            continue
+        if is_dataclass(value):
+            shared = share_structure(value, previous)
+        else:
+            shared = previous if value == previous else value
+        if shared is not value:
+            changes[name] = shared
+        if shared is not previous:
+            all_shared = False
+    if all_shared:
+        return old
+    return copy_model(new, changes) if changes else new
+
+_PARSERS = compile_parsers(Player)
 
 class DataParser:
-    """数据解析器"""
-    
-    @staticmethod
-    def parse_mcc_plus_status(data: Optional[Dict[str, Any]]) -> Optional[MCCPlusStatus]:
-        if not data:
-            return None
-        return MCCPlusStatus(
-            active=data.get('active', False),
-            tier=data.get('tier')
-        )
-    
-    @staticmethod
-    def parse_crown_level(data: Optional[Dict[str, Any]]) -> Optional[CrownLevel]:
-        if not data:
-            return None
-        return CrownLevel(
-            level=data.get('level', 0),
-            progress=data.get('progress', 0.0)
-        )
-    
-    @staticmethod
-    def parse_status(data: Optional[Dict[str, Any]]) -> Optional[PlayerStatus]:
-        if not data:
-            return None
-        return PlayerStatus(
-            first_login=data.get('firstLogin'),
-            last_login=data.get('lastLogin'),
-            online=data.get('online', False)
-        )
-    
-    @staticmethod
-    def parse_collections(data: Optional[Dict[str, Any]]) -> Optional[Collections]:
-        if not data:
-            return None
-        return Collections(
-            currency=data.get('currency'),
-            cosmetics=data.get('cosmetics'),
-            trophies=data.get('trophies')
-        )
-    
-    @staticmethod
-    def parse_social(data: Optional[Dict[str, Any]]) -> Optional[Social]:
-        if not data:
-            return None
-        return Social(
-            friends=data.get('friends'),
-            party=data.get('party')
-        )
-    
-    @staticmethod
-    def parse_global_stats(data: Optional[Dict[str, Any]]) -> Optional[GlobalStats]:
-        if not data:
-            return None
-        return GlobalStats(
-            wins=data.get('wins', 0),
-            played=data.get('played', 0),
-            playtime=data.get('playtime', 0)
-        )
-    
-    @staticmethod
-    def parse_parkour_warrior_stats(data: Optional[Dict[str, Any]]) -> Optional[ParkourWarriorStats]:
-        if not data:
-            return None
-        return ParkourWarriorStats(
-            wins=data.get('wins', 0),
-            played=data.get('played', 0),
-            playtime=data.get('playtime', 0),
-            completions=data.get('completions', 0),
-            fastest_completion=data.get('fastestCompletion')
-        )
-    
-    @staticmethod
-    def parse_sky_battle_stats(data: Optional[Dict[str, Any]]) -> Optional[SkyBattleStats]:
-        if not data:
-            return None
-        return SkyBattleStats(
-            wins=data.get('wins', 0),
-            played=data.get('played', 0),
-            playtime=data.get('playtime', 0),
-            kills=data.get('kills', 0),
-            deaths=data.get('deaths', 0)
-        )
-    
-    @staticmethod
-    def parse_tgttos_stats(data: Optional[Dict[str, Any]]) -> Optional[TGTTOSStats]:
-        if not data:
-            return None
-        return TGTTOSStats(
-            wins=data.get('wins', 0),
-            played=data.get('played', 0),
-            playtime=data.get('playtime', 0),
-            finishes=data.get('finishes', 0),
-            fastest_completion=data.get('fastestCompletion')
-        )
-    
-    @staticmethod
-    def parse_hitw_stats(data: Optional[Dict[str, Any]]) -> Optional[HITWStats]:
-        if not data:
-            return None
-        return HITWStats(
-            wins=data.get('wins', 0),
-            played=data.get('played', 0),
-            playtime=data.get('playtime', 0),
-            qualifications=data.get('qualifications', 0),
-            fastest_completion=data.get('fastestCompletion')
-        )
-    
-    @staticmethod
-    def parse_battle_box_stats(data: Optional[Dict[str, Any]]) -> Optional[BattleBoxStats]:
-        if not data:
-            return None
-        return BattleBoxStats(
-            wins=data.get('wins', 0),
-            played=data.get('played', 0),
-            playtime=data.get('playtime', 0),
-            kills=data.get('kills', 0),
-            deaths=data.get('deaths', 0)
-        )
-    
-    @staticmethod
-    def parse_dynaball_stats(data: Optional[Dict[str, Any]]) -> Optional[DynaballStats]:
-        if not data:
-            return None
-        return DynaballStats(
-            wins=data.get('wins', 0),
-            played=data.get('played', 0),
-            playtime=data.get('playtime', 0),
-            kills=data.get('kills', 0),
-            deaths=data.get('deaths', 0)
-        )
-    
-    @staticmethod
-    def parse_rocket_spleef_stats(data: Optional[Dict[str, Any]]) -> Optional[RocketSpleefStats]:
-        if not data:
-            return None
-        return RocketSpleefStats(
-            wins=data.get('wins', 0),
-            played=data.get('played', 0),
-            playtime=data.get('playtime', 0),
-            kills=data.get('kills', 0),
-            deaths=data.get('deaths', 0)
-        )
-    
-    @staticmethod
-    def parse_fishing_stats(data: Optional[Dict[str, Any]]) -> Optional[FishingStats]:
-        if not data:
-            return None
-        return FishingStats(
-            total=data.get('total', 0),
-            treasure=data.get('treasure', 0),
-            fish=data.get('fish', 0),
-            junk=data.get('junk', 0)
-        )
-    
-    @staticmethod
-    def parse_statistics(data: Optional[Dict[str, Any]]) -> Optional[PlayerStatistics]:
-        if not data:
-            return None
-        
-        global_stats = DataParser.parse_global_stats(data.get('global'))
-        if not global_stats:
-            return None
-            
-        return PlayerStatistics(
-            global_stats=global_stats,
-            parkour_warrior=DataParser.parse_parkour_warrior_stats(data.get('parkourWarrior')),
-            sky_battle=DataParser.parse_sky_battle_stats(data.get('skyBattle')),
-            tgttos=DataParser.parse_tgttos_stats(data.get('tgttos')),
-            hitw=DataParser.parse_hitw_stats(data.get('hitw')),
-            battle_box=DataParser.parse_battle_box_stats(data.get('battleBox')),
-            dynaball=DataParser.parse_dynaball_stats(data.get('dynaball')),
-            rocket_spleef=DataParser.parse_rocket_spleef_stats(data.get('rocketSpleef')),
-            fishing=DataParser.parse_fishing_stats(data.get('fishing'))
-        )
-    
-    @staticmethod
-    def parse_player(data: Dict[str, Any]) -> Optional[Player]:
-        """解析玩家数据"""
-        if not data or 'uuid' not in data:
-            return None
-        
-        # 对于简化的查询，只解析基本字段
-        return Player(
-            uuid=data['uuid'],
-            username=data.get('username', ''),
-            ranks=data.get('ranks', []),
-            mcc_plus_status=DataParser.parse_mcc_plus_status(data.get('mccPlusStatus')) if 'mccPlusStatus' in data else None,
-            crown_level=DataParser.parse_crown_level(data.get('crownLevel')) if 'crownLevel' in data else None,
-            status=DataParser.parse_status(data.get('status')) if 'status' in data else None,
-            collections=DataParser.parse_collections(data.get('collections')) if 'collections' in data else None,
-            social=DataParser.parse_social(data.get('social')) if 'social' in data else None,
-            statistics=DataParser.parse_statistics(data.get('statistics')) if 'statistics' in data else None
-        )
\ No newline at end of file
+    """数据解析器
+
+    解析函数在导入时按数据模型的字段表（schema.model_schema）生成，
+    与查询选择集（query_builder）使用同一份字段表。
+    """
+    parse_mcc_plus_status = staticmethod(_PARSERS[MCCPlusStatus])
+    parse_crown_level = staticmethod(_PARSERS[CrownLevel])
+    parse_status = staticmethod(_PARSERS[PlayerStatus])
+    parse_collections = staticmethod(_PARSERS[Collections])
+    parse_social = staticmethod(_PARSERS[Social])
+    parse_global_stats = staticmethod(_PARSERS[GlobalStats])
+    parse_parkour_warrior_stats = staticmethod(_PARSERS[ParkourWarriorStats])
+    parse_sky_battle_stats = staticmethod(_PARSERS[SkyBattleStats])
+    parse_tgttos_stats = staticmethod(_PARSERS[TGTTOSStats])
+    parse_hitw_stats = staticmethod(_PARSERS[HITWStats])
+    parse_battle_box_stats = staticmethod(_PARSERS[BattleBoxStats])
+    parse_dynaball_stats = staticmethod(_PARSERS[DynaballStats])
+    parse_rocket_spleef_stats = staticmethod(_PARSERS[RocketSpleefStats])
+    parse_fishing_stats = staticmethod(_PARSERS[FishingStats])
+    parse_statistics = staticmethod(_PARSERS[PlayerStatistics])
+    parse_player = staticmethod(_PARSERS[Player])
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Awaitable, Dict, List, Optional, TypeVar
+from .exceptions import QueryTimeoutError
+
+T = TypeVar("T")
+
+# 各阶段超时次数
+timeout_counts: Counter = Counter()
+
+class _TimeoutScope:
+    """一条命令的阶段栈和超时记录，由命令的截止时间和由它派生的截止时间共享"""
+    
+    __slots__ = ("expires_at", "stages", "timed_out_stage", "recorded")
+    
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+        self.stages: List[str] = []
+        self.timed_out_stage: Optional[str] = None
+        self.recorded = False
+
+class Deadline:
+    """端到端截止时间
+    
+    在命令入口创建，沿调用链逐层传递；每一层用剩余时间作为自己的超时。
+    stages 记录当前正在等待的阶段（外层在前），可能跨任务（如单飞共享的请求）。
+    命令到期后第一个因超时或取消而退出的层记下此时最内层的阶段，
+    超时计入该阶段，与各层被取消的先后无关；每条命令只计一次。
+    """
+    
+    __slots__ = ("expires_at", "scope")
+    
+    def __init__(self, seconds: float, scope: Optional[_TimeoutScope] = None):
+        self.expires_at = time.monotonic() + seconds
+        self.scope = scope if scope is not None else _TimeoutScope(self.expires_at)
+    
+    def extended(self, seconds: float) -> "Deadline":
+        """至少还有 seconds 秒的截止时间，与本截止时间共享阶段栈和超时记录
+        
+        用于单飞共享的请求：请求不随发起者的截止时间结束（等待者各自按自己的截止时间放弃），
+        发起者超时时仍能看到共享请求内部正在等待的阶段。
+        """
+        return Deadline(max(self.remaining(), seconds), self.scope)
+    
+    @property
+    def stages(self) -> List[str]:
+        return self.scope.stages
+    
+    @property
+    def timed_out_stage(self) -> Optional[str]:
+        return self.scope.timed_out_stage
+    
+    def remaining(self) -> float:
+        """剩余秒数"""
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+    
+    def cap(self, seconds: float) -> float:
+        """把本层的超时限制在剩余时间内"""
+        return min(seconds, self.remaining())
+
+def record_timeout(stage: str, deadline: Optional[Deadline] = None) -> QueryTimeoutError:
+    """记录一次超时并返回对应异常
+
+    给出 deadline 时，计入命令到期时最内层正在等待的阶段，每条命令只计一次。
+    """
+    if deadline is not None:
+        scope = deadline.scope
+        stage = scope.timed_out_stage or stage
+        if scope.recorded:
+            return QueryTimeoutError(stage)
+        scope.recorded = True
+    timeout_counts[stage] += 1
+    return QueryTimeoutError(stage)
+
+def _leave(deadline: Deadline, stage: str) -> None:
+    # 外层可能先于（跨任务的）内层退出，删除最后一个同名阶段而不是直接 pop
+    stages = deadline.stages
+    for index in range(len(stages) - 1, -1, -1):
+        if stages[index] == stage:
+            del stages[index]
+            return
+
+async def within(deadline: Optional[Deadline], awaitable: Awaitable[T], stage: str) -> T:
+    """在截止时间内等待，超时时取消等待并抛出 QueryTimeoutError"""
+    if deadline is None:
+        return await awaitable
+    
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        # 未开始的协程需要关闭，避免 "never awaited" 警告
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise record_timeout(stage, deadline)
+    
+    deadline.stages.append(stage)
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+        # 外层的 wait_for 可能先触发并取消内层，内层在外层处理超时之前就已退出；
+        # 到期后第一个退出的层看到的栈顶才是到期时最内层的阶段
+        timed_out = isinstance(e, asyncio.TimeoutError)
+        scope = deadline.scope
+        if (timed_out or time.monotonic() >= scope.expires_at) and scope.timed_out_stage is None:
+            scope.timed_out_stage = scope.stages[-1]
+        if timed_out:
+            raise record_timeout(stage, deadline) from None
+        raise
+    finally:
+        _leave(deadline, stage)
+
+def get_timeout_stats() -> Dict[str, int]:
+    """获取各阶段超时次数"""
+    return dict(timeout_counts)
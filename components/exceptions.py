@@ -0,0 +1,25 @@
+class MCCIslandError(Exception):
+    """插件异常基类"""
+
+class APIBusyError(MCCIslandError):
+    """本地限流队列已满，请求被拒绝"""
+
+class APIUnavailableError(MCCIslandError):
+    """熔断器打开，上游API暂时不可用"""
+    
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class UpstreamError(MCCIslandError):
+    """上游API返回了错误（而不是“玩家不存在”）"""
+
+class APIAuthError(UpstreamError):
+    """API密钥无效或未配置（401/403）"""
+
+class QueryTimeoutError(MCCIslandError):
+    """超过命令的截止时间"""
+    
+    def __init__(self, stage: str):
+        super().__init__(f"查询超时（{stage}）")
+        self.stage = stage
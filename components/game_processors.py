@@ -1,3 +1,5 @@
+import math
+from datetime import datetime
 from typing import Optional, List
 from .data_models import (
     Player, PlayerStatistics, GlobalStats, ParkourWarriorStats, SkyBattleStats,
@@ -8,8 +10,29 @@ from .player_service import PlayerService
 class GameStatsFormatter:
     """游戏统计数据格式化器"""
     
-    def __init__(self, player_service: PlayerService):
+    def __init__(self, player_service: PlayerService, show_percentiles: bool = True,
+                 min_population: int = 20):
         self.player_service = player_service
+        self.show_percentiles = show_percentiles
+        self.min_population = min_population
+    
+    def rank_note(self, game: str, metric: str, value: float) -> str:
+        """指标在本地已查询玩家中的排名，如“（前 12%）”或“（后 30%）”
+
+        前后都不在一半以内（如只有一名玩家或大量并列）、人数不足或没有统计存储时为空。
+        """
+        store = self.player_service.stats_store
+        if not self.show_percentiles or store is None:
+            return ""
+        top = store.top_percent(game, metric, value, self.min_population)
+        if top is None:
+            return ""
+        if top <= 50:
+            return f"（前 {max(1, math.ceil(top))}%）"
+        bottom = store.bottom_percent(game, metric, value, self.min_population)
+        if bottom is not None and bottom <= 50:
+            return f"（后 {max(1, math.ceil(bottom))}%）"
+        return ""
     
     def format_global_stats(self, stats: GlobalStats) -> str:
         """格式化全局统计"""
@@ -19,7 +42,7 @@ class GameStatsFormatter:
         return f"""📊 **全局统计**
 🏆 胜利次数: {stats.wins}
 🎮 游戏次数: {stats.played}
-📈 胜率: {win_rate:.1f}%
+📈 胜率: {win_rate:.1f}%{self.rank_note("global_stats", "win_rate", win_rate) if stats.played else ""}
 ⏱️ 游戏时长: {playtime}"""
     
     def format_parkour_warrior_stats(self, stats: ParkourWarriorStats) -> str:
@@ -35,9 +58,9 @@ class GameStatsFormatter:
         return f"""🏃 **跑酷勇士 (Parkour Warrior)**
 🏆 胜利次数: {stats.wins}
 🎮 游戏次数: {stats.played}
-📈 胜率: {win_rate:.1f}%
+📈 胜率: {win_rate:.1f}%{self.rank_note("parkour_warrior", "win_rate", win_rate) if stats.played else ""}
 ✅ 完成次数: {stats.completions}
-📊 完成率: {completion_rate:.1f}%
+📊 完成率: {completion_rate:.1f}%{self.rank_note("parkour_warrior", "completion_rate", completion_rate) if stats.played else ""}
 ⚡ 最快完成: {fastest_text}
 ⏱️ 游戏时长: {playtime}"""
     
@@ -50,10 +73,10 @@ class GameStatsFormatter:
         return f"""⚔️ **天空大战 (Sky Battle)**
 🏆 胜利次数: {stats.wins}
 🎮 游戏次数: {stats.played}
-📈 胜率: {win_rate:.1f}%
+📈 胜率: {win_rate:.1f}%{self.rank_note("sky_battle", "win_rate", win_rate) if stats.played else ""}
 💀 击杀数: {stats.kills}
 ☠️ 死亡数: {stats.deaths}
-📊 K/D比率: {kd_ratio:.2f}
+📊 K/D比率: {kd_ratio:.2f}{self.rank_note("sky_battle", "kd_ratio", kd_ratio)}
 ⏱️ 游戏时长: {playtime}"""
     
     def format_tgttos_stats(self, stats: TGTTOSStats) -> str:
@@ -69,9 +92,9 @@ class GameStatsFormatter:
         return f"""🏁 **TGTTOS (To Get To The Other Side)**
 🏆 胜利次数: {stats.wins}
 🎮 游戏次数: {stats.played}
-📈 胜率: {win_rate:.1f}%
+📈 胜率: {win_rate:.1f}%{self.rank_note("tgttos", "win_rate", win_rate) if stats.played else ""}
 🎯 完成次数: {stats.finishes}
-📊 完成率: {finish_rate:.1f}%
+📊 完成率: {finish_rate:.1f}%{self.rank_note("tgttos", "completion_rate", finish_rate) if stats.played else ""}
 ⚡ 最快完成: {fastest_text}
 ⏱️ 游戏时长: {playtime}"""
     
@@ -88,9 +111,9 @@ class GameStatsFormatter:
         return f"""🕳️ **HITW (Hole in the Wall)**
 🏆 胜利次数: {stats.wins}
 🎮 游戏次数: {stats.played}
-📈 胜率: {win_rate:.1f}%
+📈 胜率: {win_rate:.1f}%{self.rank_note("hitw", "win_rate", win_rate) if stats.played else ""}
 ✅ 晋级次数: {stats.qualifications}
-📊 晋级率: {qualification_rate:.1f}%
+📊 晋级率: {qualification_rate:.1f}%{self.rank_note("hitw", "completion_rate", qualification_rate) if stats.played else ""}
 ⚡ 最快完成: {fastest_text}
 ⏱️ 游戏时长: {playtime}"""
     
@@ -103,10 +126,10 @@ class GameStatsFormatter:
         return f"""📦 **战斗盒子 (Battle Box)**
 🏆 胜利次数: {stats.wins}
 🎮 游戏次数: {stats.played}
-📈 胜率: {win_rate:.1f}%
+📈 胜率: {win_rate:.1f}%{self.rank_note("battle_box", "win_rate", win_rate) if stats.played else ""}
 💀 击杀数: {stats.kills}
 ☠️ 死亡数: {stats.deaths}
-📊 K/D比率: {kd_ratio:.2f}
+📊 K/D比率: {kd_ratio:.2f}{self.rank_note("battle_box", "kd_ratio", kd_ratio)}
 ⏱️ 游戏时长: {playtime}"""
     
     def format_dynaball_stats(self, stats: DynaballStats) -> str:
@@ -118,10 +141,10 @@ class GameStatsFormatter:
         return f"""💣 **炸弹球 (Dynaball)**
 🏆 胜利次数: {stats.wins}
 🎮 游戏次数: {stats.played}
-📈 胜率: {win_rate:.1f}%
+📈 胜率: {win_rate:.1f}%{self.rank_note("dynaball", "win_rate", win_rate) if stats.played else ""}
 💀 击杀数: {stats.kills}
 ☠️ 死亡数: {stats.deaths}
-📊 K/D比率: {kd_ratio:.2f}
+📊 K/D比率: {kd_ratio:.2f}{self.rank_note("dynaball", "kd_ratio", kd_ratio)}
 ⏱️ 游戏时长: {playtime}"""
     
     def format_rocket_spleef_stats(self, stats: RocketSpleefStats) -> str:
@@ -133,10 +156,10 @@ class GameStatsFormatter:
         return f"""🚀 **火箭铲雪 (Rocket Spleef)**
 🏆 胜利次数: {stats.wins}
 🎮 游戏次数: {stats.played}
-📈 胜率: {win_rate:.1f}%
+📈 胜率: {win_rate:.1f}%{self.rank_note("rocket_spleef", "win_rate", win_rate) if stats.played else ""}
 💀 击杀数: {stats.kills}
 ☠️ 死亡数: {stats.deaths}
-📊 K/D比率: {kd_ratio:.2f}
+📊 K/D比率: {kd_ratio:.2f}{self.rank_note("rocket_spleef", "kd_ratio", kd_ratio)}
 ⏱️ 游戏时长: {playtime}"""
     
     def format_fishing_stats(self, stats: FishingStats) -> str:
@@ -149,7 +172,7 @@ class GameStatsFormatter:
         junk_rate = (stats.junk / stats.total * 100) if stats.total > 0 else 0
         
         return f"""🎣 **钓鱼统计**
-🎯 总钓鱼次数: {stats.total}
+🎯 总钓鱼次数: {stats.total}{self.rank_note("fishing", "total", stats.total)}
 💎 宝藏: {stats.treasure} ({treasure_rate:.1f}%)
 🐟 鱼类: {stats.fish} ({fish_rate:.1f}%)
 🗑️ 垃圾: {stats.junk} ({junk_rate:.1f}%)"""
@@ -157,9 +180,11 @@ class GameStatsFormatter:
 class GameStatsProcessor:
     """游戏统计处理器"""
     
-    def __init__(self, player_service: PlayerService):
+    def __init__(self, player_service: PlayerService, show_data_age: bool = True,
+                 show_percentiles: bool = True, min_population: int = 20):
         self.player_service = player_service
-        self.formatter = GameStatsFormatter(player_service)
+        self.formatter = GameStatsFormatter(player_service, show_percentiles, min_population)
+        self.show_data_age = show_data_age
     
     def get_available_games(self, player: Player) -> List[str]:
         """获取玩家有数据的游戏列表"""
@@ -217,6 +242,12 @@ class GameStatsProcessor:
             if player.collections.trophies is not None:
                 overview += f"\n🏆 奖杯: {player.collections.trophies}"
         
+        if self.show_data_age:
+            stale_since = self.player_service.get_stale_timestamp(player)
+            if stale_since is not None:
+                as_of = datetime.fromtimestamp(stale_since).strftime("%Y-%m-%d %H:%M")
+                overview += f"\n🕒 数据时间: {as_of}（正在更新）"
+        
         return overview
     
     def format_game_stats(self, player: Player, game: str) -> Optional[str]:
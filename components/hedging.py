@@ -0,0 +1,100 @@
+import math
+import time
+from bisect import bisect_right
+from collections import deque
+from typing import Any, Dict, Optional
+
+class LatencyTracker:
+    """滑动窗口延迟统计"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=max(1, window))
+        self._sorted: Optional[list] = None
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def percentile(self, p: float) -> Optional[float]:
+        """窗口内第 p 百分位延迟"""
+        if not self._samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        # nearest-rank 百分位
+        index = min(len(self._sorted) - 1, max(0, math.ceil(len(self._sorted) * p / 100) - 1))
+        return self._sorted[index]
+
+    def mean_above(self, seconds: float) -> Optional[float]:
+        """窗口内超过 seconds 的样本的平均值；没有这样的样本时返回None"""
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        tail = self._sorted[bisect_right(self._sorted, seconds):]
+        return sum(tail) / len(tail) if tail else None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+class HedgePolicy:
+    """对冲请求策略
+
+    只读查询超过 p95 延迟仍未返回时，再发一个相同请求，取先返回者。
+    对冲请求数不超过总请求数的 max_hedge_ratio，且只在限流器有空闲令牌时发出，
+    不会挤占正常请求的配额。
+    """
+
+    def __init__(self, percentile: float = 95, min_delay: float = 0.05,
+                 max_hedge_ratio: float = 0.1, min_samples: int = 20, window: int = 200):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.latency = LatencyTracker(window)
+
+        # 统计计数
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.estimated_saved = 0.0
+        self._started = time.monotonic()
+
+    def hedge_delay(self) -> Optional[float]:
+        """发出对冲请求前的等待时间；样本不足时返回None"""
+        if len(self.latency) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latency.percentile(self.percentile))
+
+    def allow_hedge(self) -> bool:
+        """对冲比例是否仍在上限内"""
+        return self.hedges_sent < self.max_hedge_ratio * self.requests
+
+    def record_primary(self, elapsed: float) -> None:
+        """主请求结束或被取消：每个主请求都计入窗口
+
+        对冲先返回（或调用方放弃）时主请求被取消，elapsed 是其延迟的下限，
+        仍计入窗口，p95 才不会因为漏掉慢请求而偏低。
+        """
+        self.latency.record(elapsed)
+
+    def record_hedge_win(self, elapsed: float) -> None:
+        """对冲请求在 elapsed 时先返回，主请求随即被取消
+
+        主请求本来还要等多久无法实测，用窗口中超过 elapsed 的主请求延迟的平均值估算
+        （窗口含被取消请求的下限样本，估算偏保守）。
+        """
+        self.hedges_won += 1
+        expected = self.latency.mean_above(elapsed)
+        if expected is not None:
+            self.estimated_saved += expected - elapsed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取对冲统计"""
+        return {
+            "requests": self.requests,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "hedge_ratio": self.hedges_sent / self.requests if self.requests else 0.0,
+            "hedge_delay_ms": round((self.hedge_delay() or 0.0) * 1000, 1),
+            "estimated_saved_ms": round(self.estimated_saved * 1000, 1),
+            "avg_estimated_saved_ms": round(self.estimated_saved / self.hedges_won * 1000, 1) if self.hedges_won else 0.0
+        }
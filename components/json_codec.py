@@ -0,0 +1,30 @@
+"""JSON 编解码
+
+安装了 orjson 时使用 orjson，否则回退到标准库 json。
+统一以 bytes 为输入输出，方便直接作为HTTP请求体和解析响应体。
+"""
+from typing import Any
+
+try:
+    import orjson
+
+    BACKEND = "orjson"
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+except ImportError:
+    import json
+
+    BACKEND = "json"
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    _decoder = json.JSONDecoder()
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode("utf-8")
+
+    def loads(data: bytes) -> Any:
+        return _decoder.decode(data.decode("utf-8"))
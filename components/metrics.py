@@ -0,0 +1,335 @@
+import asyncio
+import os
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 尝试导入astrbot logger，如果失败则使用标准logging
+try:
+    from astrbot.api import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+# 阶段耗时直方图的桶上界（秒）
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# 计数器的标签名
+COUNTER_LABELS = {
+    "requests": "command",
+    "errors": "kind",
+    "upstream_errors": "kind",
+    "cache": "result"
+}
+
+# 命令路径上的阶段，按发生顺序（用于展示）
+STAGES = ("parse_args", "rate_limit_wait", "http", "json_decode", "data_parse", "format", "command")
+
+class Histogram:
+    """固定桶直方图"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        # 最后一个桶为 +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """按桶线性插值估算分位数"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                if index == len(self.bounds):
+                    return lower
+                upper = self.bounds[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.bounds[-1]
+
+class QueryTrace:
+    """单次查询的追踪记录（/mccdebug）
+
+    追踪期间 METRICS 记录的阶段耗时和计数同时写入这里（即使未启用指标收集）；
+    notes 记录缓存层级、单飞合并等路径信息。
+    """
+
+    __slots__ = ("stages", "counters", "notes")
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self.notes: Dict[str, Any] = {}
+
+# 当前命令的追踪记录；只有 /mccdebug 会设置
+query_trace_var: ContextVar[Optional[QueryTrace]] = ContextVar("mcc_query_trace", default=None)
+
+def trace_note(key: str, value: Any) -> None:
+    """向当前追踪记录写入路径信息（未追踪时忽略）"""
+    trace = query_trace_var.get()
+    if trace is not None:
+        trace.notes[key] = value
+
+class MetricsRegistry:
+    """阶段耗时直方图与计数器
+
+    热路径只做一次字典查找和一次 bisect；缓存、限流器等组件的详细状态
+    通过 collector 在导出时读取。
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = True
+        self.buckets = buckets
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """记录一次阶段耗时"""
+        trace = query_trace_var.get()
+        if trace is not None:
+            trace.stages.setdefault(stage, []).append(seconds)
+        if not self.enabled:
+            return
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def inc(self, name: str, label: str = "", amount: int = 1) -> None:
+        """计数器加一"""
+        key = (name, label)
+        trace = query_trace_var.get()
+        if trace is not None:
+            trace.counters[key] = trace.counters.get(key, 0) + amount
+        if not self.enabled:
+            return
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, Any]]) -> None:
+        """注册导出时读取的组件状态（如 cache.get_stats）"""
+        self._collectors[name] = collect
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for name, collect in self._collectors.items():
+            try:
+                result[name] = collect()
+            except Exception as e:
+                logger.warning(f"Metrics collector {name} failed: {str(e)}")
+        return result
+
+    def reset(self) -> None:
+        self.stages.clear()
+        self.counters.clear()
+
+METRICS = MetricsRegistry()
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_prometheus(registry: MetricsRegistry = METRICS, prefix: str = "mccisland") -> str:
+    """导出为 Prometheus 文本格式"""
+    lines: List[str] = []
+
+    if registry.stages:
+        name = f"{prefix}_stage_seconds"
+        lines.append(f"# HELP {name} Command path stage latency")
+        lines.append(f"# TYPE {name} histogram")
+        for stage, histogram in sorted(registry.stages.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {_format_value(histogram.sum)}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+    by_name: Dict[str, List[Tuple[str, int]]] = {}
+    for (counter, label), value in registry.counters.items():
+        by_name.setdefault(counter, []).append((label, value))
+    for counter, values in sorted(by_name.items()):
+        name = f"{prefix}_{counter}_total"
+        label_name = COUNTER_LABELS.get(counter, "label")
+        lines.append(f"# TYPE {name} counter")
+        for label, value in sorted(values):
+            labels = f'{{{label_name}="{label}"}}' if label else ""
+            lines.append(f"{name}{labels} {value}")
+
+    # 组件状态导出为 gauge；字符串状态（如熔断器 state）导出为带标签的 1
+    for component, stats in sorted(registry.collect().items()):
+        for key, value in sorted(stats.items()):
+            name = f"{prefix}_{component}_{key}"
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+            elif isinstance(value, str):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f'{name}{{value="{value}"}} 1')
+
+    return "\n".join(lines) + "\n"
+
+def render_summary(registry: MetricsRegistry = METRICS) -> str:
+    """管理员命令使用的简要文本"""
+    if not registry.enabled:
+        return "📊 指标收集未启用（metrics.enabled）"
+
+    lines = ["📊 **MCC Island 插件指标**", "", "⏱️ 阶段耗时（次数 / p50 / p95 / p99）:"]
+    ordered = [s for s in STAGES if s in registry.stages] + sorted(set(registry.stages) - set(STAGES))
+    if not ordered:
+        lines.append("• 暂无数据")
+    for stage in ordered:
+        h = registry.stages[stage]
+        lines.append(
+            f"• {stage}: {h.count} / {h.quantile(0.5) * 1000:.1f}ms / "
+            f"{h.quantile(0.95) * 1000:.1f}ms / {h.quantile(0.99) * 1000:.1f}ms"
+        )
+
+    if registry.counters:
+        lines.extend(["", "🔢 计数:"])
+        for (counter, label), value in sorted(registry.counters.items()):
+            lines.append(f"• {counter}{'[' + label + ']' if label else ''}: {value}")
+
+    hits = registry.counters.get(("cache", "hit"), 0) + registry.counters.get(("cache", "stale"), 0)
+    lookups = hits + registry.counters.get(("cache", "miss"), 0)
+    if lookups:
+        cache = registry.collect().get("cache") or {}
+        lines.extend(["", f"💾 缓存: 命中率 {hits / lookups:.1%}，条目 {cache.get('size', 0)}"])
+    return "\n".join(lines)
+
+# 追踪报告中的阶段名
+TRACE_STAGE_NAMES = {
+    "parse_args": "参数解析",
+    "rate_limit_wait": "限流等待",
+    "http": "HTTP",
+    "json_decode": "JSON解码",
+    "data_parse": "数据解析",
+    "format": "格式化",
+    "command": "命令总耗时"
+}
+
+CACHE_RESULT_NAMES = {"hit": "命中", "stale": "过期命中（后台刷新）", "miss": "未命中"}
+
+def render_trace(trace: QueryTrace, registry: MetricsRegistry = METRICS) -> str:
+    """/mccdebug 的追踪报告：本次查询的路径与耗时，以及各组件的当前状态"""
+    lines = ["🔍 **查询追踪**", "", "🧭 路径:"]
+    cache_results = [label for (name, label) in trace.counters if name == "cache"]
+    lines.append(f"• 内存缓存: {'、'.join(CACHE_RESULT_NAMES.get(r, r) for r in cache_results) or '未查询'}")
+    for key, title in (("negative_cache", "负缓存"), ("persistent_cache", "持久化缓存"), ("single_flight", "单飞合并")):
+        if key in trace.notes:
+            lines.append(f"• {title}: {trace.notes[key]}")
+    attempts = len(trace.stages.get("http", ()))
+    if attempts:
+        lines.append(f"• HTTP 请求: {attempts} 次，接收 {trace.counters.get(('bytes_received', ''), 0)} 字节")
+    else:
+        lines.append("• HTTP 请求: 无")
+    errors = [f"{name}[{label}]" for (name, label) in trace.counters if name in ("errors", "upstream_errors")]
+    if errors:
+        lines.append(f"• 错误: {', '.join(errors)}")
+
+    lines.extend(["", "⏱️ 耗时:"])
+    ordered = [s for s in STAGES if s in trace.stages] + sorted(set(trace.stages) - set(STAGES))
+    for stage in ordered:
+        values = trace.stages[stage]
+        suffix = f"（{len(values)} 次）" if len(values) > 1 else ""
+        lines.append(f"• {TRACE_STAGE_NAMES.get(stage, stage)}: {sum(values) * 1000:.2f}ms{suffix}")
+
+    components = registry.collect()
+    lines.extend(["", "🧩 组件状态:"])
+    cache = components.get("cache")
+    if cache:
+        lines.append(f"• 内存缓存: {cache['size']}/{cache['max_entries']} 条")
+    for key, title in (("negative_cache", "负缓存"), ("username_index", "用户名索引")):
+        if key in components:
+            lines.append(f"• {title}: {components[key]['size']} 条")
+    if "persistent_cache" in components:
+        lines.append(f"• 持久化缓存: 待写入 {components['persistent_cache']['pending_writes']} 条")
+    limiter = components.get("rate_limiter")
+    if limiter:
+        lines.append(f"• 限流器: 剩余令牌 {limiter['tokens']}，排队 {limiter['queue_depth']}")
+    breaker = components.get("circuit_breaker")
+    if breaker:
+        lines.append(f"• 熔断器: {breaker['state']}（连续失败 {breaker['consecutive_failures']}）")
+    in_flight = []
+    if "single_flight" in components:
+        in_flight.append(f"单飞 {components['single_flight']['in_flight']}")
+    if "batcher" in components:
+        in_flight.append(f"待合并 {components['batcher']['pending']}，批次 {components['batcher']['in_flight']}")
+    if in_flight:
+        lines.append(f"• 在途: {'，'.join(in_flight)}")
+    return "\n".join(lines)
+
+class MetricsExporter:
+    """定期写 Prometheus 文本文件，和/或在本地端口提供 /metrics"""
+
+    def __init__(self, registry: MetricsRegistry = METRICS, file_path: Optional[str] = None,
+                 interval: float = 15.0, http_host: str = "127.0.0.1", http_port: int = 0):
+        self.registry = registry
+        self.file_path = file_path
+        self.interval = interval
+        self.http_host = http_host
+        self.http_port = http_port
+        self._task: Optional[asyncio.Task] = None
+        self._runner = None
+
+    async def start(self) -> None:
+        if self.file_path:
+            self._task = asyncio.ensure_future(self._write_loop())
+        if self.http_port:
+            from aiohttp import web
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.http_host, self.http_port).start()
+            logger.info(f"Metrics endpoint: http://{self.http_host}:{self.http_port}/metrics")
+
+    async def _handle_metrics(self, request):
+        from aiohttp import web
+        return web.Response(text=render_prometheus(self.registry), content_type="text/plain", charset="utf-8")
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self._write, render_prometheus(self.registry))
+            except Exception as e:
+                logger.error(f"Metrics export failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def _write(self, text: str) -> None:
+        # 先写临时文件再替换，采集方不会读到半个文件
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.file_path)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.file_path:
+            self._write(render_prometheus(self.registry))
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
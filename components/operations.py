@@ -0,0 +1,66 @@
+from typing import Any, Dict, Optional, Tuple
+from .json_codec import dumps
+from .query_builder import build_query
+
+# 玩家查询的字段选择集
+PLAYER_STATUS_SELECTION = "uuid username ranks status { online }"
+
+class Operation:
+    """预编译的GraphQL操作
+
+    查询文本和操作名在创建时序列化为请求体前缀，
+    每次请求只需要序列化变量。
+    """
+    
+    __slots__ = ("name", "query", "read_only", "_prefix")
+    
+    def __init__(self, name: Optional[str], query: str):
+        self.name = name
+        self.query = query
+        # 只读查询可以安全地重复发送（对冲请求）
+        self.read_only = query.lstrip().startswith(("query", "{"))
+        prefix = b'{"query":' + dumps(query)
+        if name:
+            prefix += b',"operationName":' + dumps(name)
+        self._prefix = prefix + b',"variables":'
+    
+    def payload(self, variables: Optional[Dict[str, Any]] = None) -> bytes:
+        """生成请求体"""
+        return self._prefix + dumps(variables or {}) + b"}"
+
+class OperationRegistry:
+    """具名操作注册表"""
+    
+    def __init__(self):
+        self._operations: Dict[Any, Operation] = {}
+    
+    def register(self, name: str, query: str) -> Operation:
+        """注册静态操作"""
+        operation = Operation(name, query)
+        self._operations[name] = operation
+        return operation
+    
+    def get(self, name: str) -> Optional[Operation]:
+        return self._operations.get(name)
+    
+    def player_lookup(self, field: str, arg_name: str, arg_type: str, selection: str) -> Operation:
+        """按根字段和选择集获取（首次使用时编译）玩家查询操作"""
+        key: Tuple[str, str] = (field, selection)
+        operation = self._operations.get(key)
+        if operation is None:
+            operation = Operation(field, build_query(field, arg_name, arg_type, selection))
+            self._operations[key] = operation
+        return operation
+    
+    def __len__(self) -> int:
+        return len(self._operations)
+
+REGISTRY = OperationRegistry()
+
+# 常用操作在导入时编译
+NEXT_ROTATION = REGISTRY.register(
+    "nextRotation",
+    "query nextRotation($rotation: Rotation!) { nextRotation(rotation: $rotation) }"
+)
+REGISTRY.player_lookup("player", "uuid", "UUID!", PLAYER_STATUS_SELECTION)
+REGISTRY.player_lookup("playerByUsername", "username", "String!", PLAYER_STATUS_SELECTION)
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+# 尝试导入astrbot logger，如果失败则使用标准logging
+try:
+    from astrbot.api import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+# (原始玩家数据, 获取时间, 已获取的字段集合)
+StoredPayload = Tuple[Dict[str, Any], float, FrozenSet[str]]
+
+class PersistentPlayerStore:
+    """SQLite 玩家数据持久化缓存
+
+    位于内存缓存之后，保存原始 GraphQL 玩家数据及获取时间，重启后按需
+    逐条加载（不会启动时全量读入）。写入先进入内存队列，由后台任务批量
+    在一个事务中写盘；所有数据库操作都在单线程执行器中完成，不阻塞事件循环。
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 300,
+                 flush_interval: float = 2.0, batch_size: int = 100,
+                 max_pending: int = 10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.max_pending = max(self.batch_size, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcc-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        # uuid -> (用户名, 数据, 获取时间, 字段)，按登记先后排列；用户名 -> uuid 索引
+        self._pending: Dict[str, Tuple[str, str, float, str]] = {}
+        self._pending_names: Dict[str, str] = {}
+        self._flush_event: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # 统计计数
+        self.loads = 0
+        self.load_hits = 0
+        self.writes = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.dropped_writes = 0
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def start(self) -> None:
+        """打开数据库并启动后台写盘任务"""
+        if self._conn is not None:
+            return
+        await self._run(self._open)
+        self._flush_event = asyncio.Event()
+        self._flush_task = asyncio.ensure_future(self._flush_loop())
+        logger.info(f"Persistent player cache opened: {self.db_path}")
+
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS players ("
+            "uuid TEXT PRIMARY KEY, username TEXT NOT NULL, "
+            "payload TEXT NOT NULL, fetched_at REAL NOT NULL, fields TEXT NOT NULL DEFAULT '[]')"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(players)")}
+        if "fields" not in columns:
+            self._conn.execute("ALTER TABLE players ADD COLUMN fields TEXT NOT NULL DEFAULT '[]'")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_players_username ON players(username)")
+        # 清理已过期的数据
+        with self._conn:
+            self._conn.execute("DELETE FROM players WHERE fetched_at <= ?", (time.time() - self.ttl_seconds,))
+
+    def put(self, uuid: str, username: str, payload: Dict[str, Any],
+            fetched_at: Optional[float] = None, fields: Iterable[str] = ()) -> None:
+        """登记一条待写入的数据（写回式，不等待磁盘）"""
+        if self._conn is None:
+            return
+        uuid = uuid.lower()
+        self._unqueue(uuid)
+        self._enqueue(uuid, (
+            username.lower(),
+            json.dumps(payload, ensure_ascii=False, separators=(",", ":")),
+            time.time() if fetched_at is None else fetched_at,
+            json.dumps(sorted(fields))
+        ))
+        self.writes += 1
+        self._trim()
+        if len(self._pending) >= self.batch_size and self._flush_event is not None:
+            self._flush_event.set()
+
+    def _enqueue(self, uuid: str, record: Tuple[str, str, float, str]) -> None:
+        self._pending[uuid] = record
+        self._pending_names[record[0]] = uuid
+
+    def _unqueue(self, uuid: str) -> Optional[Tuple[str, str, float, str]]:
+        record = self._pending.pop(uuid, None)
+        if record is not None and self._pending_names.get(record[0]) == uuid:
+            del self._pending_names[record[0]]
+        return record
+
+    def _trim(self) -> None:
+        """队列超过上限（如磁盘长时间不可写）时丢弃最早登记的数据"""
+        while len(self._pending) > self.max_pending:
+            self._unqueue(next(iter(self._pending)))
+            self.dropped_writes += 1
+
+    async def load(self, uuid: str) -> Optional[StoredPayload]:
+        """按UUID读取未过期的数据"""
+        uuid = uuid.lower()
+        pending = self._pending.get(uuid)
+        if pending is not None:
+            return self._decode(*pending[1:])
+        return await self._load_where("uuid = ?", uuid)
+
+    async def load_by_username(self, username: str) -> Optional[StoredPayload]:
+        """按用户名读取未过期的数据"""
+        name = username.lower()
+        uuid = self._pending_names.get(name)
+        if uuid is not None:
+            return self._decode(*self._pending[uuid][1:])
+        return await self._load_where("username = ?", name)
+
+    async def _load_where(self, condition: str, value: str) -> Optional[StoredPayload]:
+        if self._conn is None:
+            return None
+        self.loads += 1
+        row = await self._run(self._select, condition, value)
+        if row is None:
+            return None
+        return self._decode(*row)
+
+    def _select(self, condition: str, value: str):
+        return self._conn.execute(
+            f"SELECT payload, fetched_at, fields FROM players WHERE {condition} "
+            f"ORDER BY fetched_at DESC LIMIT 1",
+            (value,)
+        ).fetchone()
+
+    def _decode(self, payload: str, fetched_at: float, fields: str) -> Optional[StoredPayload]:
+        if fetched_at + self.ttl_seconds <= time.time():
+            return None
+        self.load_hits += 1
+        return json.loads(payload), fetched_at, frozenset(json.loads(fields))
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Persistent cache flush failed: {str(e)}")
+
+    async def flush(self) -> None:
+        """把待写入的数据在一个事务中写盘"""
+        if not self._pending or self._conn is None:
+            return
+        batch, newer = self._pending, {}
+        self._pending, self._pending_names = newer, {}
+        rows = [(uuid, *record) for uuid, record in batch.items()]
+        try:
+            await self._run(self._write, rows)
+        except BaseException:
+            # 写盘失败（如数据库被锁）时放回队列头部，下次刷新重试；不覆盖期间写入的更新数据
+            self.flush_failures += 1
+            self._pending, self._pending_names = {}, {}
+            for uuid, record in batch.items():
+                if uuid not in newer:
+                    self._enqueue(uuid, record)
+            for uuid, record in newer.items():
+                self._enqueue(uuid, record)
+            self._trim()
+            raise
+        self.flushes += 1
+
+    def _write(self, rows) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO players (uuid, username, payload, fetched_at, fields) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    async def close(self) -> None:
+        """写入剩余数据并关闭数据库"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if self._conn is not None:
+            try:
+                await self.flush()
+            finally:
+                await self._run(self._conn.close)
+                self._conn = None
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取持久化缓存统计"""
+        return {
+            "pending_writes": len(self._pending),
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "dropped_writes": self.dropped_writes,
+            "loads": self.loads,
+            "load_hits": self.load_hits
+        }
@@ -1,14 +1,47 @@
+import asyncio
 import re
-from typing import Optional, Union
+import time
+from typing import Any, Dict, Iterable, Optional, Sequence, Union
 from .api_client import MCCIslandAPIClient
 from .data_models import Player, DataParser
-from astrbot.api import logger
+from .exceptions import MCCIslandError, APIAuthError, APIBusyError, APIUnavailableError, UpstreamError
+from .single_flight import SingleFlight
+from .cache import PlayerCache, UsernameIndex, NegativeCache
+from .persistent_cache import PersistentPlayerStore
+from .stats_store import GAME_COLUMNS, StatsStore
+from .query_builder import FieldSet, build_selection, covers
+from .deadline import Deadline, within
+from .metrics import METRICS, query_trace_var, trace_note
+from .structured_log import EventLogger
+
+# 尝试导入astrbot logger，如果失败则使用标准logging
+try:
+    from astrbot.api import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+log = EventLogger(logger)
 
 class PlayerService:
     """玩家查询服务"""
     
-    def __init__(self, api_client: MCCIslandAPIClient):
+    def __init__(self, api_client: MCCIslandAPIClient, cache: Optional[PlayerCache] = None,
+                 username_index: Optional[UsernameIndex] = None,
+                 negative_cache: Optional[NegativeCache] = None,
+                 store: Optional[PersistentPlayerStore] = None,
+                 stats_store: Optional[StatsStore] = None, flight_timeout: float = 15.0):
         self.api_client = api_client
+        # 单飞共享请求的时间预算（至少为发起者的剩余时间），各等待者按自己的截止时间放弃
+        self.flight_timeout = flight_timeout
+        self.cache = cache
+        self.negative_cache = negative_cache
+        self.store = store
+        self.stats_store = stats_store
+        # 缓存统一以UUID为键，用户名先经索引解析为UUID
+        self.username_index = username_index if username_index is not None else UsernameIndex()
+        self._refresh_tasks = {}
+        self.single_flight = SingleFlight()
     
     def is_valid_uuid(self, uuid_string: str) -> bool:
         """验证UUID格式"""
@@ -25,104 +58,241 @@ class PlayerService:
             return False
         return re.match(r'^[a-zA-Z0-9_]+$', username) is not None
     
-    async def get_player(self, identifier: str) -> Optional[Player]:
-        """获取玩家信息（自动识别UUID或用户名）"""
+    async def get_player(self, identifier: str, fields: Iterable[str] = (),
+                         deadline: Optional[Deadline] = None) -> Optional[Player]:
+        """获取玩家信息（自动识别UUID或用户名）
+        
+        fields 为所需的数据模型字段路径（见 query_builder），只请求这些字段。
+        deadline 为命令的截止时间，超时抛出 QueryTimeoutError。
+        """
         try:
             # 清理输入
             identifier = identifier.strip()
             
             if self.is_valid_uuid(identifier):
-                # 使用UUID查询（暂时使用基本信息）
-                logger.info(f"Querying player by UUID: {identifier}")
-                response = await self.api_client.get_player_by_uuid(identifier)
+                log.info("player_query", kind="uuid", id=identifier)
+                return await self._load_player("uuid", identifier, frozenset(fields), deadline)
             elif self.is_valid_username(identifier):
-                # 使用用户名查询（使用简化版本避免字段错误）
-                logger.info(f"Querying player by username: {identifier}")
-                response = await self.api_client.get_player_basic_info(identifier)
+                log.info("player_query", kind="username", id=identifier)
+                return await self._load_player("username", identifier, frozenset(fields), deadline)
             else:
-                logger.warning(f"Invalid identifier format: {identifier}")
-                return None
-            
-            # 检查响应是否有错误
-            if "error" in response:
-                error_msg = response['error']
-                logger.error(f"API error: {error_msg}")
-                # 如果是401错误，提供更详细的错误信息
-                if "状态码: 401" in error_msg:
-                    logger.error("API密钥无效或未配置，请检查config.json文件")
-                return None
-            
-            # 检查是否找到玩家数据
-            if "data" not in response:
-                logger.warning("No data in API response")
+                log.info("invalid_identifier", id=identifier)
                 return None
             
-            player_data = None
-            if "player" in response["data"] and response["data"]["player"]:
-                player_data = response["data"]["player"]
-            elif "playerByUsername" in response["data"] and response["data"]["playerByUsername"]:
-                player_data = response["data"]["playerByUsername"]
-            
-            if not player_data:
-                logger.info(f"Player not found: {identifier}")
-                return None
-            
-            # 解析玩家数据
-            player = DataParser.parse_player(player_data)
-            if player:
-                logger.info(f"Successfully retrieved player: {player.username} ({player.uuid})")
-            
-            return player
-            
+        except MCCIslandError:
+            raise
         except Exception as e:
-            logger.error(f"Error getting player {identifier}: {str(e)}")
+            log.error("player_query_failed", id=identifier, error=e)
             return None
     
-    async def get_player_by_uuid(self, uuid: str) -> Optional[Player]:
+    async def get_player_by_uuid(self, uuid: str, fields: Iterable[str] = (),
+                                 deadline: Optional[Deadline] = None) -> Optional[Player]:
         """通过UUID获取玩家信息"""
         if not self.is_valid_uuid(uuid):
-            logger.warning(f"Invalid UUID format: {uuid}")
+            log.info("invalid_identifier", kind="uuid", id=uuid)
             return None
         
         try:
-            response = await self.api_client.get_player_by_uuid(uuid)
-            
-            if "error" in response:
-                logger.error(f"API error: {response['error']}")
-                return None
-            
-            if "data" not in response or not response["data"].get("player"):
-                logger.info(f"Player not found with UUID: {uuid}")
-                return None
-            
-            return DataParser.parse_player(response["data"]["player"])
-            
+            return await self._load_player("uuid", uuid, frozenset(fields), deadline)
+        except MCCIslandError:
+            raise
         except Exception as e:
-            logger.error(f"Error getting player by UUID {uuid}: {str(e)}")
+            log.error("player_query_failed", kind="uuid", id=uuid, error=e)
             return None
     
-    async def get_player_by_username(self, username: str) -> Optional[Player]:
+    async def get_player_by_username(self, username: str, fields: Iterable[str] = (),
+                                     deadline: Optional[Deadline] = None) -> Optional[Player]:
         """通过用户名获取玩家信息"""
         if not self.is_valid_username(username):
-            logger.warning(f"Invalid username format: {username}")
+            log.info("invalid_identifier", kind="username", id=username)
             return None
         
         try:
-            response = await self.api_client.get_player_basic_info(username)
-            
-            if "error" in response:
-                logger.error(f"API error: {response['error']}")
-                return None
-            
-            if "data" not in response or not response["data"].get("playerByUsername"):
-                logger.info(f"Player not found with username: {username}")
-                return None
-            
-            return DataParser.parse_player(response["data"]["playerByUsername"])
-            
+            return await self._load_player("username", username, frozenset(fields), deadline)
+        except MCCIslandError:
+            raise
+        except Exception as e:
+            log.error("player_query_failed", kind="username", id=username, error=e)
+            return None
+    
+    async def _load_player(self, kind: str, value: str, fields: FieldSet,
+                           deadline: Optional[Deadline] = None) -> Optional[Player]:
+        """加载玩家，优先读缓存，相同查询的并发请求合并为一次API调用"""
+        if self.cache is not None:
+            uuid = value if kind == "uuid" else self.username_index.resolve(value)
+            if uuid:
+                entry = self.cache.get_entry(uuid.lower(), fields)
+                if entry:
+                    # 陈旧数据立即返回，同时在后台刷新
+                    if entry.is_stale():
+                        METRICS.inc("cache", "stale")
+                        self._schedule_refresh(entry.player.uuid, entry.fields)
+                    else:
+                        METRICS.inc("cache", "hit")
+                    return entry.player
+            METRICS.inc("cache", "miss")
+        
+        if self.negative_cache is not None and self.negative_cache.contains((kind, value.lower())):
+            log.info("player_not_found", id=value, cached=True)
+            trace_note("negative_cache", "命中（玩家不存在）")
+            return None
+        
+        # 键包含查询形状（UUID/用户名、字段集合）和归一化后的标识符
+        key = (kind, value.lower(), fields)
+        trace_note("single_flight", "加入在途请求" if self.single_flight.is_in_flight(key) else "发起请求")
+        # 共享请求不随发起者的截止时间结束（预算更长的等待者可能加入），每个等待者只等到自己的截止时间
+        flight_deadline = deadline.extended(self.flight_timeout) if deadline is not None else None
+        flight = self.single_flight.do(key, lambda: self._load_uncached(kind, value, fields, flight_deadline))
+        return await within(deadline, flight, "single_flight")
+    
+    async def _load_uncached(self, kind: str, value: str, fields: FieldSet,
+                             deadline: Optional[Deadline] = None) -> Optional[Player]:
+        """内存缓存未命中：先查磁盘缓存，再请求API"""
+        if self.store is not None:
+            try:
+                player = await within(deadline, self._load_from_store(kind, value, fields), "persistent_cache")
+                trace_note("persistent_cache", "命中" if player else "未命中")
+                if player:
+                    return player
+            except MCCIslandError:
+                raise
+            except Exception as e:
+                log.error("persistent_cache_read_failed", id=value, error=e)
+        return await self._fetch_player(kind, value, fields, deadline)
+    
+    async def _load_from_store(self, kind: str, value: str, fields: FieldSet) -> Optional[Player]:
+        """从磁盘缓存加载玩家并放回内存缓存"""
+        if kind == "uuid":
+            record = await self.store.load(value)
+        else:
+            record = await self.store.load_by_username(value)
+        if record is None:
+            return None
+        
+        payload, fetched_at, stored_fields = record
+        if not covers(stored_fields, fields):
+            return None
+        return self._store_payload(payload, stored_fields, fetched_at, persist=False)
+    
+    def _schedule_refresh(self, uuid: str, fields: FieldSet) -> None:
+        """后台刷新陈旧的缓存条目，同一玩家同时只刷新一次"""
+        key = uuid.lower()
+        if key in self._refresh_tasks:
+            return
+        task = asyncio.ensure_future(self._refresh_player(uuid, fields))
+        self._refresh_tasks[key] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(key, None))
+    
+    async def _refresh_player(self, uuid: str, fields: FieldSet) -> None:
+        # 后台刷新不计入触发它的那次追踪
+        query_trace_var.set(None)
+        try:
+            await self.single_flight.do(
+                ("uuid", uuid.lower(), fields),
+                lambda: self._fetch_player("uuid", uuid, fields)
+            )
         except Exception as e:
-            logger.error(f"Error getting player by username {username}: {str(e)}")
+            log.error("background_refresh_failed", uuid=uuid, error=e)
+    
+    async def close(self) -> None:
+        """停止后台刷新并关闭磁盘缓存"""
+        for task in list(self._refresh_tasks.values()):
+            task.cancel()
+        if self.store is not None:
+            await self.store.close()
+    
+    def get_stale_timestamp(self, player: Player) -> Optional[float]:
+        """如果该玩家数据是以陈旧缓存返回的，返回其获取时间"""
+        if self.cache is None:
+            return None
+        entry = self.cache.peek(player.uuid.lower())
+        if entry and entry.player is player and entry.is_stale():
+            return entry.fetched_at
+        return None
+    
+    async def _fetch_player(self, kind: str, value: str, fields: FieldSet,
+                            deadline: Optional[Deadline] = None) -> Optional[Player]:
+        """从API获取并解析玩家数据"""
+        selection = build_selection(fields)
+        if kind == "uuid":
+            response = await self.api_client.get_player_by_uuid(value, selection, deadline)
+            field = "player"
+        else:
+            response = await self.api_client.get_player_by_username(value, selection, deadline)
+            field = "playerByUsername"
+        
+        # 检查响应是否有错误
+        if "error" in response:
+            error_msg = response['error']
+            log.error("api_error", id=value, error=error_msg)
+            if response.get("busy"):
+                raise APIBusyError(error_msg)
+            if response.get("unavailable"):
+                raise APIUnavailableError(error_msg, response.get("retry_after", 0.0))
+            if response.get("auth_failed"):
+                log.error("api_key_rejected", hint="API密钥无效或未配置，请检查config.json文件")
+                raise APIAuthError(error_msg)
+            # 错误响应不能当作“玩家不存在”
+            raise UpstreamError(error_msg)
+        
+        # 检查是否找到玩家数据
+        if "data" not in response:
+            log.warning("api_response_without_data", id=value)
+            raise UpstreamError("API响应缺少 data")
+        
+        player_data = response["data"].get(field)
+        if not player_data:
+            log.info("player_not_found", id=value, cached=False)
+            # 只缓存API明确返回的“不存在”，错误响应不会走到这里
+            if self.negative_cache is not None:
+                self.negative_cache.add((kind, value.lower()))
             return None
+        
+        if self.negative_cache is not None:
+            self.negative_cache.discard((kind, value.lower()))
+        
+        # 解析玩家数据
+        player = self._store_payload(player_data, fields)
+        if player:
+            log.info("player_fetched", username=player.username, uuid=player.uuid)
+        
+        return player
+    
+    def _store_payload(self, payload: Dict[str, Any], fields: FieldSet,
+                       fetched_at: Optional[float] = None, persist: bool = True) -> Optional[Player]:
+        """解析原始数据并写入各级缓存，同一玩家的部分数据会被合并"""
+        start = time.perf_counter()
+        if self.cache is None:
+            player = DataParser.parse_player(payload)
+            METRICS.observe("data_parse", time.perf_counter() - start)
+            if player:
+                self.username_index.update(player.username, player.uuid)
+                self._track_stats(player, payload, fields)
+                if persist and self.store is not None:
+                    self.store.put(player.uuid, player.username, payload, fetched_at, fields)
+            return player
+        
+        if "uuid" not in payload:
+            return None
+        entry = self.cache.put_payload(payload["uuid"].lower(), payload, fields, fetched_at)
+        METRICS.observe("data_parse", time.perf_counter() - start)
+        if entry is None:
+            return None
+        
+        player = entry.player
+        self.username_index.update(player.username, player.uuid)
+        self._track_stats(player, entry.payload, entry.fields)
+        if persist and self.store is not None:
+            self.store.put(player.uuid, player.username, entry.payload, entry.fetched_at, entry.fields)
+        return player
+    
+    def _track_stats(self, player: Player, payload: Dict[str, Any], fields: FieldSet) -> None:
+        """把本次获取到的游戏统计写入列式存储（读原始数据，不触发延迟解析）"""
+        if self.stats_store is None or not isinstance(payload.get("statistics"), dict):
+            return
+        games = [game for game in GAME_COLUMNS if covers(fields, (f"statistics.{game}",))]
+        if games:
+            self.stats_store.update(player.uuid, player.username, payload["statistics"], games)
     
     def format_playtime(self, seconds: int) -> str:
         """格式化游戏时间"""
@@ -152,7 +322,7 @@ class PlayerService:
             return float(kills) if kills > 0 else 0.0
         return kills / deaths
     
-    def get_rank_display_name(self, ranks: list[str]) -> str:
+    def get_rank_display_name(self, ranks: Sequence[str]) -> str:
         """获取等级显示名称"""
         if not ranks:
             return "无等级"
@@ -0,0 +1,79 @@
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Optional
+from .data_models import Player
+from .schema import model_schema
+
+# 查询需求用数据模型的属性路径表示，例如 "crown_level"、"statistics.fishing"。
+# 父路径覆盖所有子路径（"statistics" 包含全部游戏）。
+FieldSet = FrozenSet[str]
+
+# 游戏参数 → PlayerStatistics 属性
+GAME_STAT_FIELDS = {
+    "global": "global_stats",
+    "parkour": "parkour_warrior",
+    "skybattle": "sky_battle",
+    "tgttos": "tgttos",
+    "hitw": "hitw",
+    "battlebox": "battle_box",
+    "dynaball": "dynaball",
+    "rocketspleef": "rocket_spleef",
+    "fishing": "fishing"
+}
+
+# 玩家概览（format_player_overview）用到的字段
+OVERVIEW_FIELDS: FieldSet = frozenset({"mcc_plus_status", "crown_level", "status", "collections"})
+
+COMMAND_FIELDS = {
+    "mcc": OVERVIEW_FIELDS | {"statistics"},
+    "fishing": OVERVIEW_FIELDS | {"statistics.fishing"},
+    "mccgames": frozenset({"statistics"})
+}
+
+def fields_for_command(command: str, game: Optional[str] = None) -> FieldSet:
+    """命令所需的字段集合"""
+    if command == "mcc" and game:
+        attr = GAME_STAT_FIELDS.get(game)
+        if attr is None:
+            return OVERVIEW_FIELDS
+        return OVERVIEW_FIELDS | {f"statistics.{attr}"}
+    return COMMAND_FIELDS.get(command, frozenset())
+
+def covers(available: Iterable[str], needed: Iterable[str]) -> bool:
+    """available 字段集合是否满足 needed"""
+    available = tuple(available)
+    return all(
+        any(need == have or need.startswith(have + ".") for have in available)
+        for need in needed
+    )
+
+def _is_wanted(path: str, fields: FieldSet) -> bool:
+    return any(
+        f == path or f.startswith(path + ".") or path.startswith(f + ".")
+        for f in fields
+    )
+
+def _selection(cls, fields: FieldSet, prefix: str) -> str:
+    parts = []
+    for spec in model_schema(cls):
+        if spec.model is None:
+            parts.append(spec.graphql)
+            continue
+
+        # 嵌套对象：被请求时才选择；必填的嵌套对象随父对象一起选择
+        path = prefix + spec.name
+        if _is_wanted(path, fields) or (prefix and spec.required):
+            parts.append(f"{spec.graphql} {{ {_selection(spec.model, fields, path + '.')} }}")
+    return " ".join(parts)
+
+@lru_cache(maxsize=128)
+def build_selection(fields: FieldSet = frozenset()) -> str:
+    """根据数据模型生成最小的玩家选择集"""
+    return _selection(Player, fields, "")
+
+@lru_cache(maxsize=128)
+def build_query(field: str, arg_name: str, arg_type: str, selection: str) -> str:
+    """生成单字段查询文档"""
+    return (
+        f"query {field}(${arg_name}: {arg_type}) "
+        f"{{ {field}({arg_name}: ${arg_name}) {{ {selection} }} }}"
+    )
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from typing import Dict, Any, Optional
+
+class TokenBucketLimiter:
+    """异步令牌桶限流器
+    
+    令牌按 requests_per_minute 匀速补充，最多积累 burst_limit 个。
+    令牌不足时调用方按先来后到排队等待；预计等待时间超过上限的请求
+    会被立即拒绝，而不是一直挂起。
+    """
+    
+    def __init__(self, requests_per_minute: int, burst_limit: int, max_wait_seconds: float = 10.0):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst_limit)
+        self.max_wait_seconds = max_wait_seconds
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        
+        # 统计计数
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+    
+    def _refill(self) -> None:
+        """按经过的时间补充令牌"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def try_acquire(self) -> bool:
+        """非阻塞获取令牌"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.acquired += 1
+            return True
+        return False
+    
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """获取令牌，必要时排队等待；超过等待上限返回False"""
+        max_wait = self.max_wait_seconds if timeout is None else timeout
+        
+        # 预留一个令牌，令牌为负表示前面还有排队的请求
+        self._refill()
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        
+        if wait > max_wait:
+            self.tokens += 1
+            self.rejected += 1
+            return False
+        
+        if wait > 0:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # 归还预留的令牌
+                self.tokens += 1
+                raise
+            finally:
+                self.queue_depth -= 1
+        
+        self.acquired += 1
+        self.total_wait_time += wait
+        self.max_wait_time = max(self.max_wait_time, wait)
+        return True
+    
+    def available_tokens(self) -> float:
+        """当前可用令牌数"""
+        self._refill()
+        return max(0.0, self.tokens)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取限流统计"""
+        return {
+            "tokens": round(self.available_tokens(), 2),
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "avg_wait_seconds": self.total_wait_time / self.acquired if self.acquired else 0.0,
+            "max_wait_seconds": self.max_wait_time
+        }
@@ -0,0 +1,105 @@
+import random
+import time
+from typing import Any, Dict, Optional
+
+class CircuitBreaker:
+    """熔断器
+
+    连续失败达到阈值后进入 open 状态，期间直接拒绝请求；
+    经过 recovery_timeout 后进入 half_open，只放行一个探测请求，
+    探测成功则恢复 closed，失败则重新 open。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+        # 统计计数
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """当前状态（open 超时后自动转为 half_open）"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """是否允许发出请求"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            # 探测请求被取消或丢失时，超时后允许新的探测
+            now = time.monotonic()
+            if not self._probe_in_flight or now - self._probe_started >= self.recovery_timeout:
+                self._probe_in_flight = True
+                self._probe_started = now
+                return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """请求结束但既不算成功也不算失败（如鉴权失败）：释放 half_open 的探测名额"""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        """距离允许探测还需等待的秒数"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取熔断器状态"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after_seconds": round(self.retry_after(), 1)
+        }
+
+class RetryPolicy:
+    """带随机抖动的指数退避重试策略"""
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """第 attempt 次重试前的等待时间；返回None表示不再重试"""
+        if attempt >= self.max_retries:
+            return None
+        if retry_after is not None:
+            # 服务端要求的等待时间过长时直接放弃
+            if retry_after > self.max_delay:
+                return None
+            return retry_after + random.uniform(0, self.base_delay)
+        # full jitter
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
@@ -0,0 +1,213 @@
+import dataclasses
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, TypeVar, Union, get_args, get_origin, get_type_hints
+
+T = TypeVar("T")
+
+# 非 Optional 标量字段在响应中缺失时的默认值
+TYPE_DEFAULTS = {int: 0, float: 0.0, bool: False, str: ""}
+
+class FieldSpec(NamedTuple):
+    """数据模型字段与 GraphQL 字段的对应关系"""
+    name: str              # 模型属性名
+    graphql: str           # GraphQL 字段名
+    kind: str              # scalar / tuple / mapping / model
+    model: Optional[type]  # kind 为 model 时的嵌套模型
+    default: Any           # 响应中缺失时的值
+    required: bool         # 缺失（或嵌套对象解析为空）时整个对象视为无效
+    lazy: bool             # 嵌套模型首次访问时才解析
+
+def graphql_name(field: dataclasses.Field) -> str:
+    """数据模型字段对应的 GraphQL 字段名（默认转为驼峰）"""
+    name = field.metadata.get("graphql")
+    if name:
+        return name
+    head, *rest = field.name.split("_")
+    return head + "".join(part.capitalize() for part in rest)
+
+def _unwrap_optional(tp) -> Tuple[Any, bool]:
+    if get_origin(tp) is Union:
+        args = [arg for arg in get_args(tp) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return tp, False
+
+@lru_cache(maxsize=None)
+def model_schema(cls: type) -> Tuple[FieldSpec, ...]:
+    """由数据模型的类型注解和字段 metadata 得到字段表
+
+    metadata 可设置 graphql（字段名）、default（缺失时的值）、required 和 lazy（仅嵌套模型）。
+    未设置时：GraphQL 名为驼峰形式，默认值按类型取（Optional 为 None），
+    没有默认值的嵌套模型字段为必需。
+    """
+    hints = get_type_hints(cls)
+    specs = []
+    for field in dataclasses.fields(cls):
+        tp, optional = _unwrap_optional(hints[field.name])
+        origin = get_origin(tp) or tp
+        if dataclasses.is_dataclass(tp):
+            kind, default = "model", None
+        elif origin is tuple:
+            kind, default = "tuple", ()
+        elif isinstance(origin, type) and issubclass(origin, Mapping):
+            kind, default = "mapping", None
+        else:
+            kind, default = "scalar", None if optional else TYPE_DEFAULTS.get(tp)
+        no_default = field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+        specs.append(FieldSpec(
+            name=field.name,
+            graphql=graphql_name(field),
+            kind=kind,
+            model=tp if kind == "model" else None,
+            default=field.metadata.get("default", default),
+            required=field.metadata.get("required", kind == "model" and no_default),
+            lazy=field.metadata.get("lazy", False)
+        ))
+        if specs[-1].lazy and kind != "model":
+            raise TypeError(f"{cls.__name__}.{field.name}: only nested models can be lazy")
+    return tuple(specs)
+
+def _literal(value: Any, namespace: Dict[str, Any], name: str) -> str:
+    if value is None or type(value) in (int, float, bool, str):
+        return repr(value)
+    namespace[name] = value
+    return name
+
+def _lazy_property(cls: type, lazy_cls: type, name: str, parse: Callable) -> property:
+    """延迟字段：slot 中先放原始子字典，首次读取时解析并写回
+
+    所有延迟字段都解析后，实例的类换回原模型，之后的读取直接走 slot。
+    """
+    slot = cls.__dict__[name]
+    get_slot = slot.__get__
+    set_slot = slot.__set__
+    lazy_slots = [cls.__dict__[spec.name].__get__ for spec in model_schema(cls) if spec.lazy]
+
+    def load(obj):
+        value = get_slot(obj)
+        if type(value) is dict:
+            value = parse(value)
+            set_slot(obj, value)
+            if not any(type(get(obj)) is dict for get in lazy_slots):
+                object.__setattr__(obj, "__class__", cls)
+        return value
+
+    # setter 只供 dataclass __init__（object.__setattr__）使用，实例仍是 frozen
+    return property(load, set_slot)
+
+def _lazy_class(cls: type) -> type:
+    """带延迟字段的模型的子类，与原模型的内存布局相同（不加 slot）
+
+    与原模型的实例按字段比较相等（dataclass 的 __eq__ 要求类型完全相同）。
+    """
+    names = tuple(field.name for field in dataclasses.fields(cls))
+
+    def __eq__(self, other):
+        if not isinstance(other, cls):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in names)
+
+    return type(f"Lazy{cls.__name__}", (cls,), {
+        "__slots__": (),
+        "__lazy_model__": cls,
+        "__eq__": __eq__,
+        "__hash__": cls.__hash__,
+        "__doc__": cls.__doc__,
+        "__module__": cls.__module__,
+        "__qualname__": cls.__qualname__
+    })
+
+def model_type(obj: Any) -> type:
+    """实例对应的数据模型类（Lazy 子类返回原模型）"""
+    cls = type(obj)
+    return getattr(cls, "__lazy_model__", cls)
+
+@lru_cache(maxsize=None)
+def _field_slots(cls: type) -> Dict[str, Any]:
+    """模型字段名 → 原模型的 slot 描述符（不经过延迟属性）"""
+    base = getattr(cls, "__lazy_model__", cls)
+    return {field.name: base.__dict__[field.name] for field in dataclasses.fields(cls)}
+
+def is_loaded(obj: Any, name: str) -> bool:
+    """字段是否已解析（延迟字段在首次访问前为 False）"""
+    return type(_field_slots(type(obj))[name].__get__(obj)) is not dict
+
+def copy_model(obj: T, changes: Dict[str, Any]) -> T:
+    """dataclasses.replace 的替代：不触发延迟字段的解析，未解析的字段保持未解析"""
+    clone = object.__new__(type(obj))
+    for name, slot in _field_slots(type(obj)).items():
+        slot.__set__(clone, changes[name] if name in changes else slot.__get__(obj))
+    return clone
+
+def compile_parsers(root: type, lazy: bool = True) -> Dict[type, Callable[[Optional[Dict[str, Any]]], Any]]:
+    """为 root 及其嵌套的数据模型生成专用解析函数
+
+    每个模型生成一个函数：逐字段 data.get、按字段类型转换，
+    然后通过 slot 描述符直接赋值（绕过 frozen dataclass 逐字段 object.__setattr__ 的 __init__）。
+    空数据返回 None。含延迟字段的模型实例化为 Lazy 子类，延迟字段先保存原始子字典；
+    lazy=False 时忽略延迟设置，全部立即解析（用于对比基准）。
+    """
+    namespace: Dict[str, Any] = {"_new": object.__new__, "_proxy": MappingProxyType}
+    parsers: Dict[type, str] = {}
+    lazy_classes: Dict[type, type] = {}
+    sources = []
+
+    def emit(cls: type) -> str:
+        if cls in parsers:
+            return parsers[cls]
+        func = parsers[cls] = f"parse_{cls.__name__}"
+        specs = model_schema(cls)
+        if not lazy:
+            specs = tuple(spec._replace(lazy=False) for spec in specs)
+        for spec in specs:
+            if spec.model is not None:
+                emit(spec.model)
+
+        if any(spec.lazy for spec in specs):
+            lazy_classes[cls] = _lazy_class(cls)
+        namespace[f"{func}_cls"] = lazy_classes.get(cls, cls)
+        lines = [f"def {func}(data):", "    if not data:", "        return None", "    get = data.get"]
+        for spec in specs:
+            if spec.required and spec.kind != "model":
+                lines.append(f"    if {spec.graphql!r} not in data:")
+                lines.append("        return None")
+            elif spec.required and spec.lazy:
+                # 嵌套模型只在数据为空时解析为 None，不必解析即可判断
+                lines.append(f"    if not get({spec.graphql!r}):")
+                lines.append("        return None")
+        for index, spec in enumerate(specs):
+            key = repr(spec.graphql)
+            default = _literal(spec.default, namespace, f"{func}_default_{index}")
+            if spec.lazy:
+                # 空数据直接记为 None（已解析），否则保存原始子字典
+                lines.append(f"    v{index} = get({key}) or None")
+            elif spec.kind == "model":
+                lines.append(f"    v{index} = {parsers[spec.model]}(get({key}))")
+                if spec.required:
+                    lines.append(f"    if v{index} is None:")
+                    lines.append("        return None")
+            elif spec.kind == "tuple":
+                lines.append(f"    v{index} = tuple(get({key}) or {default})")
+            elif spec.kind == "mapping":
+                lines.append(f"    v{index} = get({key})")
+                lines.append(f"    v{index} = _proxy(v{index}) if v{index} is not None else {default}")
+            else:
+                lines.append(f"    v{index} = get({key}, {default})")
+        lines.append(f"    obj = _new({func}_cls)")
+        for index, spec in enumerate(specs):
+            setter = f"{func}_set_{spec.name}"
+            namespace[setter] = cls.__dict__[spec.name].__set__
+            lines.append(f"    {setter}(obj, v{index})")
+        lines.append("    return obj")
+        sources.append("\n".join(lines))
+        return func
+
+    emit(root)
+    exec(compile("\n\n".join(sources), f"<parsers for {root.__name__}>", "exec"), namespace)
+    for cls, lazy_cls in lazy_classes.items():
+        for spec in model_schema(cls):
+            if spec.lazy:
+                setattr(lazy_cls, spec.name, _lazy_property(cls, lazy_cls, spec.name, namespace[parsers[spec.model]]))
+    return {cls: namespace[func] for cls, func in parsers.items()}
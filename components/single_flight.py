@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """合并相同键的并发请求
+    
+    同一时刻相同键只会执行一次 func，其余调用方等待同一个结果；
+    返回值（包括None）和异常都会传递给所有等待者。
+    所有等待者都被取消（如超过截止时间）时，共享的请求也随之取消。
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self._waiters: Dict["asyncio.Task[Any]", int] = {}
+        self.leaders = 0
+        self.joins = 0
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """执行或加入一次在途请求"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.joins += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        
+        # shield: 单个调用方被取消时不影响其他等待者
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(task) == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            remaining = self._waiters.get(task, 1) - 1
+            if remaining > 0:
+                self._waiters[task] = remaining
+            else:
+                self._waiters.pop(task, None)
+    
+    def _finish(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        self._waiters.pop(task, None)
+        # 所有等待者都已取消时，避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+    
+    def is_in_flight(self, key: Hashable) -> bool:
+        """该键是否有在途请求"""
+        return key in self._inflight
+    
+    def in_flight(self) -> int:
+        """当前在途请求数"""
+        return len(self._inflight)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取合并统计"""
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "joins": self.joins
+        }
@@ -0,0 +1,256 @@
+"""列式统计存储
+
+每个游戏的每个指标一列（安装了 NumPy 时为 float64 数组，否则为 array('d')），
+行号由玩家UUID索引，缺失的数据为 NaN。用于百分位排名等需要遍历大量玩家的计算。
+"""
+import math
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from .data_models import PlayerStatistics
+from .schema import model_schema
+
+try:
+    import numpy as np
+
+    BACKEND = "numpy"
+except ImportError:
+    np = None
+    BACKEND = "python"
+
+NAN = float("nan")
+
+# 各游戏表示“完成”的指标（完成率 = 完成次数 / 游戏次数）
+COMPLETION_METRICS = {
+    "parkour_warrior": "completions",
+    "tgttos": "finishes",
+    "hitw": "qualifications"
+}
+
+DERIVED_METRICS = ("win_rate", "kd_ratio", "completion_rate")
+
+# 没有胜负的游戏用于排名的指标
+RANKED_RAW_METRICS = {"fishing": "total"}
+
+def _game_columns() -> Dict[str, Tuple[str, Tuple[Tuple[str, str], ...]]]:
+    """游戏属性名 → (GraphQL 字段名, ((指标名, GraphQL 字段名), ...))，来自数据模型字段表"""
+    games = {}
+    for game in model_schema(PlayerStatistics):
+        metrics = tuple(
+            (spec.name, spec.graphql) for spec in model_schema(game.model) if spec.kind == "scalar"
+        )
+        games[game.name] = (game.graphql, metrics)
+    return games
+
+GAME_COLUMNS = _game_columns()
+
+def _ranked_metrics() -> Dict[str, Tuple[str, ...]]:
+    """各游戏维护排名索引的指标（与回复中展示的胜率、K/D、完成率对应）"""
+    ranked = {}
+    for game, (_, metrics) in GAME_COLUMNS.items():
+        names = {metric for metric, _ in metrics}
+        chosen = []
+        if {"wins", "played"} <= names:
+            chosen.append("win_rate")
+        if {"kills", "deaths"} <= names:
+            chosen.append("kd_ratio")
+        if game in COMPLETION_METRICS:
+            chosen.append("completion_rate")
+        if game in RANKED_RAW_METRICS:
+            chosen.append(RANKED_RAW_METRICS[game])
+        ranked[game] = tuple(chosen)
+    return ranked
+
+RANKED_METRICS = _ranked_metrics()
+
+def _ranked_value(game: str, metric: str, values: Mapping[str, float]) -> float:
+    """单个玩家的排名指标值，算法与 StatsStore._derived 相同"""
+    if metric not in DERIVED_METRICS:
+        return values[metric]
+    if metric == "win_rate":
+        numerator, denominator, scale = values["wins"], values["played"], 100.0
+    elif metric == "kd_ratio":
+        numerator, denominator, scale = values["kills"], values["deaths"], 1.0
+    else:
+        numerator, denominator, scale = values[COMPLETION_METRICS[game]], values["played"], 100.0
+    if denominator == 0:
+        return numerator if metric == "kd_ratio" else NAN
+    return numerator / denominator * scale
+
+class RankIndex:
+    """单个指标的有序数组，支持 O(log n) 排名查询
+
+    同时按行号记录每个玩家当前的值；玩家刷新时删除旧值、插入新值
+    （bisect 定位，列表内存移动为 O(n) 但很快）。NaN 不参与排名。
+    """
+
+    __slots__ = ("_values", "_rows")
+
+    def __init__(self):
+        self._values: List[float] = []
+        self._rows: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def set(self, row: int, new: float) -> None:
+        """更新某行的值"""
+        rows = self._rows
+        if row >= len(rows):
+            rows.extend([NAN] * (row + 1 - len(rows)))
+        old = rows[row]
+        rows[row] = new
+        if old == new or (math.isnan(old) and math.isnan(new)):
+            return
+        if not math.isnan(old):
+            position = bisect_left(self._values, old)
+            if position < len(self._values) and self._values[position] == old:
+                del self._values[position]
+        if not math.isnan(new):
+            insort(self._values, new)
+
+    def rank(self, value: float) -> int:
+        """高于 value 的数量 + 1（并列取最好名次）"""
+        return len(self._values) - bisect_right(self._values, value) + 1
+
+class StatsStore:
+    """玩家统计的列式存储
+
+    update 直接读取原始 statistics 数据（按数据模型的 GraphQL 字段名），
+    不会触发 Player.statistics 的延迟解析；同一玩家再次写入时原地更新。
+    """
+
+    def __init__(self, max_players: int = 10000, initial_capacity: int = 256):
+        self.max_players = max(1, max_players)
+        self._index: Dict[str, int] = {}
+        self._uuids: List[str] = []
+        self._usernames: List[str] = []
+        self._capacity = 0
+        self._columns: Dict[Tuple[str, str], Any] = {
+            (game, metric): self._new_column(0)
+            for game, (_, metrics) in GAME_COLUMNS.items()
+            for metric, _ in metrics
+        }
+        self._grow(min(initial_capacity, self.max_players))
+        self._ranks: Dict[Tuple[str, str], RankIndex] = {
+            (game, metric): RankIndex() for game, metrics in RANKED_METRICS.items() for metric in metrics
+        }
+
+        # 统计计数
+        self.updates = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _new_column(size: int):
+        if np is not None:
+            return np.full(size, np.nan)
+        return array("d", [NAN]) * size
+
+    def _grow(self, capacity: int) -> None:
+        for key, column in self._columns.items():
+            grown = self._new_column(capacity)
+            grown[:self._capacity] = column[:self._capacity]
+            self._columns[key] = grown
+        self._capacity = capacity
+
+    def __len__(self) -> int:
+        return len(self._uuids)
+
+    def __contains__(self, uuid: str) -> bool:
+        return uuid.lower() in self._index
+
+    def update(self, uuid: str, username: str, statistics: Optional[Mapping[str, Any]],
+               games: Optional[Iterable[str]] = None) -> bool:
+        """写入一个玩家的原始 statistics 数据
+
+        games 为本次数据包含的游戏（部分查询只获取了其中几个），默认全部；
+        未包含的游戏保留原值，包含但为空的游戏记为 NaN。达到 max_players 时不再接收新玩家。
+        """
+        key = uuid.lower()
+        row = self._index.get(key)
+        if row is None:
+            if len(self._uuids) >= self.max_players:
+                self.rejected += 1
+                return False
+            row = len(self._uuids)
+            if row >= self._capacity:
+                self._grow(min(self.max_players, max(self._capacity * 2, row + 1)))
+            self._index[key] = row
+            self._uuids.append(uuid)
+            self._usernames.append(username)
+        else:
+            self._usernames[row] = username
+
+        statistics = statistics or {}
+        for game in (GAME_COLUMNS if games is None else games):
+            graphql, metrics = GAME_COLUMNS[game]
+            data = statistics.get(graphql) or {}
+            values = {}
+            for metric, field in metrics:
+                value = data.get(field)
+                value = values[metric] = NAN if value is None else float(value)
+                self._columns[(game, metric)][row] = value
+            for metric in RANKED_METRICS[game]:
+                self._ranks[(game, metric)].set(row, _ranked_value(game, metric, values))
+        self.updates += 1
+        return True
+
+    def top_percent(self, game: str, metric: str, value: float, min_population: int = 1) -> Optional[float]:
+        """value 在已记录玩家中排前百分之几（O(log n)）；人数不足 min_population 时为 None"""
+        index = self._ranks.get((game, metric))
+        if index is None or len(index) < max(1, min_population) or math.isnan(value):
+            return None
+        return index.rank(value) / len(index) * 100
+
+    def bottom_percent(self, game: str, metric: str, value: float, min_population: int = 1) -> Optional[float]:
+        """value 在已记录玩家中排后百分之几（不高于 value 的比例，O(log n)）；人数不足时为 None"""
+        index = self._ranks.get((game, metric))
+        if index is None or len(index) < max(1, min_population) or math.isnan(value):
+            return None
+        return (len(index) - index.rank(value) + 1) / len(index) * 100
+
+    def column(self, game: str, metric: str):
+        """某游戏某指标的一列（只读使用；NumPy 后端为视图）"""
+        if metric in DERIVED_METRICS:
+            return self._derived(game, metric)
+        try:
+            column = self._columns[(game, metric)]
+        except KeyError:
+            raise ValueError(f"未知的统计指标: {game}.{metric}") from None
+        return column[:len(self._uuids)]
+
+    def _derived(self, game: str, metric: str):
+        """派生指标：胜率（%）、K/D、完成率（%）；游戏次数为 0 时为 NaN"""
+        if metric == "win_rate":
+            numerator, denominator, scale = self.column(game, "wins"), self.column(game, "played"), 100.0
+        elif metric == "kd_ratio":
+            numerator, denominator, scale = self.column(game, "kills"), self.column(game, "deaths"), 1.0
+        else:
+            completion = COMPLETION_METRICS.get(game)
+            if completion is None:
+                raise ValueError(f"{game} 没有完成率")
+            numerator, denominator, scale = self.column(game, completion), self.column(game, "played"), 100.0
+
+        # K/D 与 calculate_kd_ratio 一致：没有死亡时取击杀数
+        zero_value = numerator if metric == "kd_ratio" else None
+        if np is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result = numerator / denominator * scale
+            fallback = zero_value if zero_value is not None else np.nan
+            return np.where(denominator == 0, fallback, result)
+        return [
+            (n / d * scale) if d else (zero_value[i] if zero_value is not None else NAN)
+            for i, (n, d) in enumerate(zip(numerator, denominator))
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计"""
+        return {
+            "backend": BACKEND,
+            "players": len(self._uuids),
+            "capacity": self._capacity,
+            "columns": len(self._columns),
+            "bytes": self._capacity * len(self._columns) * 8,
+            "updates": self.updates,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,111 @@
+import itertools
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# 当前命令的追踪ID；命令入口设置，处理器、玩家服务和API客户端的日志共用
+trace_id_var: ContextVar[str] = ContextVar("mcc_trace_id", default="-")
+
+_trace_ids = itertools.count(1)
+_trace_prefix = f"{os.getpid() & 0xffff:04x}"
+
+def new_trace_id() -> str:
+    """生成追踪ID（进程内递增，足够区分并发的命令）"""
+    return f"{_trace_prefix}-{next(_trace_ids):x}"
+
+class LogConfig:
+    """日志采样与限流配置（所有 EventLogger 共用）"""
+
+    def __init__(self):
+        self.sample_rates: Dict[str, float] = {}
+        self.default_sample_rate = 1.0
+        self.error_burst = 5
+        self.error_interval = 60.0
+
+    def configure(self, sample_rates: Optional[Dict[str, float]] = None, default_sample_rate: float = 1.0,
+                  error_burst: int = 5, error_interval: float = 60.0) -> None:
+        self.sample_rates = dict(sample_rates or {})
+        self.default_sample_rate = default_sample_rate
+        self.error_burst = max(1, error_burst)
+        self.error_interval = error_interval
+
+LOG_CONFIG = LogConfig()
+
+class _Event:
+    """延迟格式化的日志消息：只有真正输出时才拼接字符串"""
+
+    __slots__ = ("event", "fields", "trace_id")
+
+    def __init__(self, event: str, fields: Dict[str, Any], trace_id: str):
+        self.event = event
+        self.fields = fields
+        self.trace_id = trace_id
+
+    def __str__(self) -> str:
+        parts = [self.event]
+        for key, value in self.fields.items():
+            value = str(value)
+            if not value or " " in value or "=" in value:
+                value = repr(value)
+            parts.append(f"{key}={value}")
+        parts.append(f"trace={self.trace_id}")
+        return " ".join(parts)
+
+class EventLogger:
+    """结构化事件日志
+
+    info/warning 按事件类型采样：同一追踪ID的各条日志采样结果一致，
+    被采到的命令能看到完整链路。error 不采样，但每种事件在
+    error_interval 内最多输出 error_burst 条，被压制的条数随下一条输出。
+    """
+
+    def __init__(self, logger: logging.Logger, config: LogConfig = LOG_CONFIG):
+        self.logger = logger
+        self.config = config
+        # 事件 → [窗口开始时间, 窗口内已输出条数, 被压制条数]
+        self._error_windows: Dict[str, list] = {}
+
+    def _sampled(self, event: str, trace_id: str) -> bool:
+        rate = self.config.sample_rates.get(event, self.config.default_sample_rate)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        if trace_id == "-":
+            return random.random() < rate
+        return (hash(trace_id) & 0xffff) < rate * 0x10000
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any]) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        trace_id = trace_id_var.get()
+        if self._sampled(event, trace_id):
+            self.logger.log(level, _Event(event, fields, trace_id))
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
+        now = time.monotonic()
+        window = self._error_windows.get(event)
+        if window is None or now - window[0] >= self.config.error_interval:
+            suppressed = window[2] if window else 0
+            window = self._error_windows[event] = [now, 0, 0]
+            if suppressed:
+                fields["suppressed"] = suppressed
+        if window[1] >= self.config.error_burst:
+            window[2] += 1
+            return
+        window[1] += 1
+        self.logger.error(_Event(event, fields, trace_id_var.get()))
@@ -1,5 +1,6 @@
 import os
 import sys
+from typing import Optional
 from astrbot.api.event import filter, AstrMessageEvent, MessageEventResult
 from astrbot.api.star import Context, Star, register
 from astrbot.api import logger
@@ -12,9 +13,18 @@ if current_dir not in sys.path:
 # 导入组件
 from components.config_manager import ConfigManager
 from components.api_client import MCCIslandAPIClient
+from components.rate_limiter import TokenBucketLimiter
+from components.resilience import CircuitBreaker, RetryPolicy
+from components.hedging import HedgePolicy
 from components.player_service import PlayerService
+from components.cache import PlayerCache, UsernameIndex, NegativeCache
+from components.persistent_cache import PersistentPlayerStore
+from components.stats_store import StatsStore
 from components.game_processors import GameStatsProcessor
 from components.command_handlers import CommandRouter
+from components.deadline import get_timeout_stats
+from components.metrics import METRICS, MetricsExporter, QueryTrace, query_trace_var, render_summary, render_trace
+from components.structured_log import LOG_CONFIG
 
 @register("mccisland", "YourName", "MCC Island 玩家数据查询插件", "1.0.0")
 class MCCIslandPlugin(Star):
@@ -25,18 +35,19 @@ class MCCIslandPlugin(Star):
         self.player_service = None
         self.game_processor = None
         self.command_router = None
+        self.metrics_exporter = None
         self.initialized = False
     
     async def on_startup(self):
         """插件启动时调用"""
         await self.initialize()
 
-    async def initialize(self):
-        """初始化插件组件"""
+    async def initialize(self, config_path: Optional[str] = None):
+        """初始化插件组件（config_path 默认为插件目录下的 config.json）"""
         try:
             # 获取插件目录
             plugin_dir = os.path.dirname(os.path.abspath(__file__))
-            config_path = os.path.join(plugin_dir, "config.json")
+            config_path = config_path or os.path.join(plugin_dir, "config.json")
             template_path = os.path.join(plugin_dir, "config.json.template")
             
             # 初始化配置管理器
@@ -62,15 +73,109 @@ class MCCIslandPlugin(Star):
                 logger.error("API密钥未配置，请在 config.json 中设置您的 MCC Island API 密钥")
                 return
             
-            # 初始化API客户端
-            self.api_client = MCCIslandAPIClient(api_key)
+            # 日志采样与错误限流
+            logging_config = self.config_manager.get_logging_config()
+            LOG_CONFIG.configure(
+                logging_config.get("sample_rates"),
+                logging_config.get("default_sample_rate", 1.0),
+                logging_config.get("error_burst", 5),
+                logging_config.get("error_interval_seconds", 60)
+            )
+            
+            # 初始化API客户端（重复初始化时先释放旧的连接池）
+            if self.api_client:
+                await self.api_client.close()
+            rate_limit = self.config_manager.get_rate_limit()
+            rate_limiter = TokenBucketLimiter(
+                rate_limit["requests_per_minute"],
+                rate_limit["burst_limit"],
+                rate_limit.get("max_wait_seconds", 10)
+            )
+            retry_config = self.config_manager.get_retry_config()
+            breaker_config = self.config_manager.get_circuit_breaker_config()
+            hedging_config = self.config_manager.get_hedging_config()
+            hedge_policy = None
+            if hedging_config.get("enabled"):
+                hedge_policy = HedgePolicy(
+                    hedging_config["percentile"],
+                    hedging_config["min_delay_ms"] / 1000.0,
+                    hedging_config["max_hedge_ratio"],
+                    hedging_config["min_samples"]
+                )
+            self.api_client = MCCIslandAPIClient(
+                api_key,
+                self.config_manager.get_http_config(),
+                rate_limiter=rate_limiter,
+                batching_config=self.config_manager.get_batching_config(),
+                retry_policy=RetryPolicy(
+                    retry_config["max_retries"],
+                    retry_config["base_delay_seconds"],
+                    retry_config["max_delay_seconds"]
+                ),
+                circuit_breaker=CircuitBreaker(
+                    breaker_config["failure_threshold"],
+                    breaker_config["recovery_timeout_seconds"]
+                ),
+                hedge_policy=hedge_policy,
+                base_url=self.config_manager.get_api_base_url()
+            )
+            await self.api_client.start()
             
             # 初始化服务组件
-            self.player_service = PlayerService(self.api_client)
-            self.game_processor = GameStatsProcessor(self.player_service)
+            cache_config = self.config_manager.get_cache_config()
+            player_cache = None
+            negative_cache = None
+            if cache_config.get("enabled"):
+                player_cache = PlayerCache(
+                    cache_config["ttl_seconds"],
+                    cache_config["max_entries"],
+                    cache_config.get("max_stale_seconds", 0)
+                )
+                negative_cache = NegativeCache(
+                    cache_config.get("negative_ttl_seconds", 60),
+                    cache_config.get("negative_max_entries", 500)
+                )
+            # 可选的磁盘缓存，重启后按需加载
+            player_store = None
+            persistent_config = cache_config.get("persistent", {})
+            if cache_config.get("enabled") and persistent_config.get("enabled"):
+                player_store = PersistentPlayerStore(
+                    os.path.join(plugin_dir, persistent_config.get("path", "player_cache.db")),
+                    persistent_config.get("ttl_seconds", cache_config["ttl_seconds"]),
+                    persistent_config.get("flush_interval_seconds", 2),
+                    persistent_config.get("batch_size", 100),
+                    persistent_config.get("max_pending", 10000)
+                )
+                await player_store.start()
+            
+            username_index = UsernameIndex(cache_config.get("username_ttl_seconds", 3600))
+            # 列式统计存储（排行榜和百分位）
+            stats_store_config = self.config_manager.get_stats_store_config()
+            stats_store = None
+            if stats_store_config.get("enabled", True):
+                stats_store = StatsStore(stats_store_config.get("max_players", 10000))
+            if self.player_service:
+                await self.player_service.close()
+            self.player_service = PlayerService(
+                self.api_client, player_cache, username_index, negative_cache, player_store, stats_store,
+                flight_timeout=self.api_client.http_config["request_timeout"]
+            )
+            display_config = self.config_manager.get_display_config()
+            self.game_processor = GameStatsProcessor(
+                self.player_service,
+                show_data_age=display_config.get("show_data_age", True),
+                show_percentiles=display_config.get("show_percentiles", True),
+                min_population=stats_store_config.get("min_population", 20)
+            )
             
             # 初始化命令路由器
-            self.command_router = CommandRouter(self.player_service, self.game_processor)
+            self.command_router = CommandRouter(
+                self.player_service, self.game_processor,
+                self.config_manager.get_timeout_config()
+            )
+            
+            # 指标：阶段耗时与计数在请求路径上记录，组件状态在导出时读取
+            await self._setup_metrics(plugin_dir, player_cache, negative_cache, player_store, rate_limiter)
             
             self.initialized = True
             logger.info("MCC Island 插件初始化成功")
@@ -79,6 +184,43 @@ class MCCIslandPlugin(Star):
             logger.error(f"插件初始化失败: {str(e)}")
             self.initialized = False
     
+    async def _setup_metrics(self, plugin_dir, player_cache, negative_cache, player_store, rate_limiter):
+        """注册组件状态收集器并启动指标导出"""
+        metrics_config = self.config_manager.get_metrics_config()
+        METRICS.enabled = metrics_config.get("enabled", True)
+        
+        collectors = {
+            "cache": player_cache.get_stats if player_cache is not None else None,
+            "negative_cache": negative_cache.get_stats if negative_cache is not None else None,
+            "persistent_cache": player_store.get_stats if player_store is not None else None,
+            "username_index": self.player_service.username_index.get_stats,
+            "rate_limiter": rate_limiter.get_stats,
+            "circuit_breaker": self.api_client.circuit_breaker.get_stats,
+            "single_flight": self.player_service.single_flight.get_stats,
+            "batcher": self.api_client.batcher.get_stats if self.api_client.batcher else None,
+            "hedging": self.api_client.hedge_policy.get_stats if self.api_client.hedge_policy else None,
+            "timeouts": get_timeout_stats,
+            "stats_store": self.player_service.stats_store.get_stats if self.player_service.stats_store else None
+        }
+        for name, collect in collectors.items():
+            if collect is not None:
+                METRICS.register_collector(name, collect)
+        
+        if self.metrics_exporter:
+            await self.metrics_exporter.stop()
+            self.metrics_exporter = None
+        export_file = metrics_config.get("export_file")
+        http_port = metrics_config.get("http_port", 0)
+        if METRICS.enabled and (export_file or http_port):
+            self.metrics_exporter = MetricsExporter(
+                METRICS,
+                os.path.join(plugin_dir, export_file) if export_file else None,
+                metrics_config.get("export_interval_seconds", 15),
+                metrics_config.get("http_host", "127.0.0.1"),
+                http_port
+            )
+            await self.metrics_exporter.start()
+    
     @filter.command("mcc")
     async def mcc_command(self, event: AstrMessageEvent):
         """MCC Island 玩家查询命令"""
@@ -129,6 +271,32 @@ class MCCIslandPlugin(Star):
             logger.error(f"处理mccgames命令时出错: {str(e)}")
             yield event.plain_result(f"❌ 处理命令时出错: {str(e)}")
     
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("mccmetrics")
+    async def mccmetrics_command(self, event: AstrMessageEvent):
+        """MCC Island 插件性能指标（仅管理员）"""
+        yield event.plain_result(render_summary(METRICS))
+    
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("mccdebug")
+    async def mccdebug_command(self, event: AstrMessageEvent):
+        """追踪一次 /mcc 查询并给出各阶段耗时（仅管理员）"""
+        if not self.initialized:
+            yield event.plain_result("❌ 插件未正确初始化，请检查配置文件和API密钥")
+            return
+        
+        trace = QueryTrace()
+        trace_token = query_trace_var.set(trace)
+        try:
+            result = await self.command_router.route_command(event, "mcc", invoked_as="mccdebug")
+        except Exception as e:
+            logger.error(f"处理mccdebug命令时出错: {str(e)}")
+            result = event.plain_result(f"❌ 处理命令时出错: {str(e)}")
+        finally:
+            query_trace_var.reset(trace_token)
+        yield result
+        yield event.plain_result(render_trace(trace, METRICS))
+    
     @filter.command("mcchelp")
     async def mcchelp_command(self, event: AstrMessageEvent):
         """MCC Island 插件帮助命令"""
@@ -169,3 +337,9 @@ class MCCIslandPlugin(Star):
         """插件销毁方法"""
         logger.info("MCC Island 插件正在关闭...")
         self.initialized = False
+        if self.metrics_exporter:
+            await self.metrics_exporter.stop()
+        if self.player_service:
+            await self.player_service.close()
+        if self.api_client:
+            await self.api_client.close()
@@ -0,0 +1,111 @@
+"""截止时间的分阶段超时计数
+
+上游 HTTP 挂起时，超时应计入最内层正在等待的阶段（http，启用批量时为 batch），
+而不是外层的 player_service；单飞共享的请求在另一个任务中运行，不应影响计数。
+"""
+import asyncio
+import contextlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web  # noqa: E402
+
+from components import deadline as deadline_module  # noqa: E402
+from components.api_client import MCCIslandAPIClient  # noqa: E402
+from components.deadline import Deadline  # noqa: E402
+from components.exceptions import APIUnavailableError, QueryTimeoutError  # noqa: E402
+from components.player_service import PlayerService  # noqa: E402
+from components.resilience import CircuitBreaker  # noqa: E402
+from tools.stand_in_server import StandInConfig, StandInServer  # noqa: E402
+
+HANGS = 5
+
+
+@contextlib.asynccontextmanager
+async def hanging_upstream(batching: bool = False):
+    """上游一直不响应的 API 客户端"""
+    release = asyncio.Event()
+
+    async def handle(request):
+        await release.wait()
+        return web.json_response({"data": {}})
+
+    app = web.Application()
+    app.router.add_post("/graphql", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    url = f"http://127.0.0.1:{runner.addresses[0][1]}/graphql"
+
+    client = MCCIslandAPIClient(
+        "test-key", batching_config={"enabled": batching, "window_ms": 1}, base_url=url,
+        circuit_breaker=CircuitBreaker(failure_threshold=HANGS)
+    )
+    deadline_module.timeout_counts.clear()
+    try:
+        yield client
+    finally:
+        release.set()
+        await client.close()
+        await runner.cleanup()
+
+
+async def hang_lookups(batching: bool):
+    """HANGS 次查询，返回各阶段超时次数"""
+    async with hanging_upstream(batching) as client:
+        service = PlayerService(client)
+        for i in range(HANGS):
+            with pytest.raises(QueryTimeoutError):
+                await service.get_player(f"Hang{i}", deadline=Deadline(0.1))
+        return deadline_module.get_timeout_stats()
+
+
+def test_http_hang_behind_single_flight_counts_as_http():
+    assert asyncio.run(hang_lookups(batching=False)) == {"http": HANGS}
+
+
+def test_http_hang_with_batching_counts_as_batch():
+    assert asyncio.run(hang_lookups(batching=True)) == {"batch": HANGS}
+
+
+def test_http_deadline_timeouts_open_the_breaker():
+    async def run():
+        async with hanging_upstream() as client:
+            service = PlayerService(client)
+            for i in range(HANGS):
+                with pytest.raises(QueryTimeoutError):
+                    await service.get_player(f"Hang{i}", deadline=Deadline(0.1))
+            # 被取消的共享请求在之后的事件循环迭代中才结束并记录失败
+            await asyncio.sleep(0.05)
+            assert client.circuit_breaker.state == CircuitBreaker.OPEN
+            # 熔断后立即回复不可用，不再等待截止时间
+            with pytest.raises(APIUnavailableError):
+                await service.get_player("Another", deadline=Deadline(0.1))
+
+    asyncio.run(run())
+
+
+def test_follower_with_larger_budget_outlives_leader():
+    async def run():
+        async with StandInServer(StandInConfig(latency="fixed:300")) as server:
+            client = MCCIslandAPIClient("test-key", base_url=server.url)
+            service = PlayerService(client)
+            deadline_module.timeout_counts.clear()
+            try:
+                leader = asyncio.ensure_future(service.get_player("Shared", deadline=Deadline(0.1)))
+                await asyncio.sleep(0)
+                follower = await service.get_player("Shared", deadline=Deadline(2.0))
+                with pytest.raises(QueryTimeoutError):
+                    await leader
+            finally:
+                await client.close()
+            assert follower is not None and follower.username == "Shared"
+            assert server.stats.requests == 1
+            # 发起者超时时共享请求正在等待 HTTP
+            assert deadline_module.get_timeout_stats() == {"http": 1}
+
+    asyncio.run(run())
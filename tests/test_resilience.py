@@ -0,0 +1,35 @@
+"""熔断器的计数：只有带数据的成功响应清零失败次数，鉴权失败不计入"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components.api_client import MCCIslandAPIClient  # noqa: E402
+from components.exceptions import APIAuthError  # noqa: E402
+from components.player_service import PlayerService  # noqa: E402
+from components.resilience import CircuitBreaker  # noqa: E402
+from tools.stand_in_server import StandInConfig, StandInServer  # noqa: E402
+
+
+def test_auth_errors_do_not_reset_the_breaker():
+    async def run():
+        async with StandInServer(StandInConfig(api_key="expected")) as server:
+            breaker = CircuitBreaker(failure_threshold=3)
+            client = MCCIslandAPIClient("wrong-key", base_url=server.url, circuit_breaker=breaker)
+            service = PlayerService(client)
+            try:
+                breaker.record_failure()
+                breaker.record_failure()
+                for i in range(4):
+                    with pytest.raises(APIAuthError):
+                        await service.get_player(f"Auth{i}")
+                # 鉴权失败既不打开熔断器，也不清零正在累积的失败次数
+                assert breaker.state == CircuitBreaker.CLOSED
+                assert breaker.get_stats()["consecutive_failures"] == 2
+            finally:
+                await client.close()
+
+    asyncio.run(run())
@@ -0,0 +1,307 @@
+"""聊天负载模拟器（容量规划）
+
+以目标 QPS 向 MCCIslandPlugin 的命令入口发送模拟的聊天命令，上游指向本地替身服务，
+回答“一个机器人实例能服务多少个群”。流量按比例混合：
+
+    /mcc <名字>            /mcc <名字> <游戏>      /fishing <名字>
+    /mccgames <名字>        /mcc（帮助）            输错的名字、不存在的玩家和游戏
+
+玩家名按 Zipf 分布抽取，少数热门名字被反复查询（模拟群里反复查同一个人）。
+
+报告: 实际吞吐、命令延迟百分位、回复类型分布、上游放大
+（每条命令对应的 HTTP 请求数和 GraphQL 根字段数）以及事件循环延迟。
+
+用法:
+    python tools/load_simulator.py --qps 50 --duration 30
+    python tools/load_simulator.py --qps 200 --duration 60 --latency lognormal:80:0.6 --config config.json
+
+--config 指定的配置会覆盖默认配置（API 密钥和地址始终改为替身服务），便于用实际的限流和缓存参数做规划。
+需要在安装了 AstrBot 的环境中运行。
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.harness import BenchEvent, percentile  # noqa: E402
+from components.config_manager import ConfigManager  # noqa: E402
+from main import MCCIslandPlugin  # noqa: E402
+from tools.stand_in_server import StandInConfig, StandInServer  # noqa: E402
+
+GAMES = ["global", "parkour", "skybattle", "tgttos", "hitw", "battlebox", "dynaball", "rocketspleef", "fishing"]
+
+# (场景, 权重)
+DEFAULT_MIX = {
+    "mcc": 35,
+    "mcc_game": 25,
+    "fishing": 15,
+    "mccgames": 10,
+    "typo": 10,
+    "help": 5
+}
+
+
+class TrafficMix:
+    """按权重生成命令，玩家名服从 Zipf 分布"""
+
+    def __init__(self, mix: Dict[str, float], population: int, zipf_s: float, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.scenarios = list(mix.keys())
+        self.weights = list(mix.values())
+        self.names = [f"Player{i:05d}" for i in range(population)]
+        # Zipf 累积分布，bisect 抽样
+        weights = [1 / (rank ** zipf_s) for rank in range(1, population + 1)]
+        total = sum(weights)
+        acc = 0.0
+        self._cdf = []
+        for weight in weights:
+            acc += weight / total
+            self._cdf.append(acc)
+
+    def name(self) -> str:
+        return self.names[min(len(self.names) - 1, bisect.bisect_left(self._cdf, self.rng.random()))]
+
+    def typo(self) -> Tuple[str, str]:
+        kind = self.rng.randrange(4)
+        if kind == 0:
+            return "mcc", f"/mcc {self.name()[:2]}"          # 名字太短
+        if kind == 1:
+            return "mcc", f"/mcc {self.name()}!"             # 非法字符
+        if kind == 2:
+            return "mcc", f"/mcc missing{self.rng.randrange(100_000)}"  # 玩家不存在
+        return "mcc", f"/mcc {self.name()} skyblock"         # 不支持的游戏
+
+    def next(self) -> Tuple[str, str, str]:
+        """返回 (场景, 命令, 消息文本)"""
+        scenario = self.rng.choices(self.scenarios, self.weights)[0]
+        if scenario == "mcc":
+            return scenario, "mcc", f"/mcc {self.name()}"
+        if scenario == "mcc_game":
+            return scenario, "mcc", f"/mcc {self.name()} {self.rng.choice(GAMES)}"
+        if scenario == "fishing":
+            return scenario, "fishing", f"/fishing {self.name()}"
+        if scenario == "mccgames":
+            return scenario, "mccgames", f"/mccgames {self.name()}"
+        if scenario == "help":
+            return scenario, "mcc", "/mcc"
+        command, message = self.typo()
+        return scenario, command, message
+
+
+def classify(text: str) -> str:
+    """按回复内容归类"""
+    if text.startswith("⏱️"):
+        return "timeout"
+    if "繁忙" in text:
+        return "busy"
+    if "暂时不可用" in text:
+        return "unavailable"
+    if text.startswith("❌"):
+        return "error_reply"
+    return "ok"
+
+
+class LoopLagMonitor:
+    """测量事件循环调度延迟：定时 sleep，记录实际唤醒比预期晚多少"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def write_config(path: str, base_url: str, overrides: Optional[str]) -> None:
+    manager = ConfigManager(path)
+    config = manager.default_config
+    if overrides:
+        with open(overrides, "r", encoding="utf-8") as f:
+            config = manager._merge_config(config, json.load(f))
+    config["api_key"] = "load-simulator"
+    config["api_base_url"] = base_url
+    # 不写入真实的磁盘缓存文件
+    config["cache"]["persistent"]["enabled"] = False
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+
+async def simulate(args) -> Dict[str, Any]:
+    server_config = StandInConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    async with StandInServer(server_config) as server:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = os.path.join(tmp, "config.json")
+            write_config(config_path, server.url, args.config)
+            plugin = MCCIslandPlugin(None)
+            await plugin.initialize(config_path)
+        if not plugin.initialized:
+            raise RuntimeError("plugin failed to initialize")
+
+        handlers = {
+            "mcc": plugin.mcc_command,
+            "fishing": plugin.fishing_command,
+            "mccgames": plugin.mccgames_command
+        }
+        mix = TrafficMix(DEFAULT_MIX, args.population, args.zipf, args.seed)
+        latencies: Dict[str, List[float]] = {}
+        outcomes: Counter = Counter()
+        in_flight = 0
+        max_in_flight = 0
+
+        async def run_one(scenario: str, command: str, message: str) -> None:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            start = time.perf_counter()
+            try:
+                async for result in handlers[command](BenchEvent(message)):
+                    outcomes[classify(result.text)] += 1
+            except Exception:
+                outcomes["exception"] += 1
+            finally:
+                latencies.setdefault(scenario, []).append(time.perf_counter() - start)
+                in_flight -= 1
+
+        monitor = LoopLagMonitor()
+        monitor.start()
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        sent = 0
+        started = loop.time()
+        next_at = started
+        # 开环发送：按到达时间发出，不等待前一条命令完成
+        while next_at - started < args.duration:
+            delay = next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.ensure_future(run_one(*mix.next()))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            sent += 1
+            gap = 1 / args.qps
+            next_at += mix.rng.expovariate(1 / gap) if args.poisson else gap
+        send_elapsed = loop.time() - started
+        if tasks:
+            await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+        await monitor.stop()
+
+        upstream = server.stats.as_dict()
+        await plugin.terminate()
+
+    all_latencies = sorted(value for values in latencies.values() for value in values)
+    lag = sorted(monitor.samples)
+
+    def ms(values: List[float], p: float) -> float:
+        return round(percentile(values, p) * 1000, 2)
+
+    return {
+        "target_qps": args.qps,
+        "sent": sent,
+        "offered_qps": round(sent / send_elapsed, 1),
+        "completed": len(all_latencies),
+        "throughput_qps": round(len(all_latencies) / elapsed, 1),
+        "max_in_flight": max_in_flight,
+        "latency_ms": {f"p{p}": ms(all_latencies, p) for p in (50, 95, 99)},
+        "latency_ms_by_scenario": {
+            scenario: {f"p{p}": ms(sorted(values), p) for p in (50, 95, 99)}
+            for scenario, values in sorted(latencies.items())
+        },
+        "outcomes": dict(outcomes),
+        "upstream": {
+            "http_requests": upstream["requests"],
+            "root_fields": upstream["root_fields"],
+            "status": upstream["status"],
+            "requests_per_command": round(upstream["requests"] / max(1, sent), 3),
+            "lookups_per_command": round(upstream["root_fields"] / max(1, sent), 3)
+        },
+        "event_loop_lag_ms": {
+            "p50": ms(lag, 50),
+            "p99": ms(lag, 99),
+            "max": round((lag[-1] if lag else 0.0) * 1000, 2)
+        }
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    latency = report["latency_ms"]
+    upstream = report["upstream"]
+    lag = report["event_loop_lag_ms"]
+    print(f"commands       sent={report['sent']} completed={report['completed']} "
+          f"max_in_flight={report['max_in_flight']}")
+    print(f"throughput     target={report['target_qps']} offered={report['offered_qps']} "
+          f"completed={report['throughput_qps']} cmd/s")
+    print(f"latency        p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms")
+    for scenario, values in report["latency_ms_by_scenario"].items():
+        print(f"  {scenario:<12} p50={values['p50']}ms p95={values['p95']}ms p99={values['p99']}ms")
+    print(f"outcomes       {report['outcomes']}")
+    print(f"upstream       http={upstream['http_requests']} lookups={upstream['root_fields']} "
+          f"status={upstream['status']}")
+    print(f"amplification  {upstream['requests_per_command']} http/cmd, "
+          f"{upstream['lookups_per_command']} lookups/cmd")
+    print(f"loop lag       p50={lag['p50']}ms p99={lag['p99']}ms max={lag['max']}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qps", type=float, default=20, help="目标命令速率")
+    parser.add_argument("--duration", type=float, default=30, help="发送时长（秒）")
+    parser.add_argument("--poisson", action="store_true", help="泊松到达（默认匀速）")
+    parser.add_argument("--population", type=int, default=5000, help="玩家名总数")
+    parser.add_argument("--zipf", type=float, default=1.1, help="名字热度的 Zipf 指数")
+    parser.add_argument("--latency", default="lognormal:60:0.5", help="替身服务延迟分布")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--config", help="覆盖默认配置的 JSON 文件（如实际的 config.json）")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="把报告另存为 JSON")
+    parser.add_argument("--verbose", action="store_true", help="保留插件日志")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # 模拟时只看报告，不输出插件日志
+        from astrbot.api import logger
+        logger.setLevel(logging.CRITICAL)
+
+    report = asyncio.run(simulate(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
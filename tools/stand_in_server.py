@@ -0,0 +1,452 @@
+"""MCC Island GraphQL 本地替身服务
+
+不依赖 api.mccisland.net，在本地提供 player、playerByUsername 和 nextRotation
+三个根字段，用于离线调试插件和性能测试。玩家数据优先取自录制的 JSON 夹具，
+夹具中没有的玩家由用户名确定性地生成（同名每次结果相同）。
+
+支持:
+    - 按查询的选择集裁剪返回字段，支持别名批量查询（p0: playerByUsername(...) ...）
+    - 可配置的延迟分布：fixed / uniform / normal / lognormal / exponential
+    - 按比例注入 5xx、429（带 Retry-After）和 GraphQL 错误
+    - GET /stats 返回请求计数
+
+用法:
+    python tools/stand_in_server.py --port 8787 --latency lognormal:40:0.5 --rate-limit-rate 0.02
+
+插件侧在 config.json 中设置 "api_base_url": "http://127.0.0.1:8787/graphql" 即可。
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import uuid as uuid_lib
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "players.json")
+
+# 用户名以此前缀开头的玩家视为不存在
+NOT_FOUND_PREFIX = "missing"
+
+
+# ---------------------------------------------------------------- 延迟分布
+
+def parse_latency(spec: str):
+    """解析延迟分布描述，返回生成延迟（秒）的函数
+
+    fixed:50            固定 50ms
+    uniform:10:80       10~80ms 均匀分布
+    normal:40:10        均值 40ms、标准差 10ms
+    lognormal:40:0.5    中位数 40ms、对数标准差 0.5（长尾）
+    exponential:40      均值 40ms
+    """
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    try:
+        if kind == "fixed":
+            return lambda rng: values[0] / 1000
+        if kind == "uniform":
+            return lambda rng: rng.uniform(values[0], values[1]) / 1000
+        if kind == "normal":
+            return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+        if kind == "lognormal":
+            mu = math.log(values[0])
+            return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+        if kind == "exponential":
+            return lambda rng: rng.expovariate(1 / values[0]) / 1000
+    except IndexError:
+        pass
+    raise ValueError(f"无效的延迟分布: {spec}")
+
+
+# ---------------------------------------------------------------- 最小GraphQL解析
+
+_TOKEN = re.compile(r'\s+|,|#[^\n]*|(?P<tok>"(?:\\.|[^"\\])*"|-?\d+(?:\.\d+)?|[A-Za-z_][A-Za-z0-9_]*|[{}()\[\]:!$=])')
+
+
+class GraphQLSyntaxError(Exception):
+    pass
+
+
+# (别名, 字段名, 参数, 子选择集)
+Selection = Tuple[str, str, Dict[str, Any], Optional[List["Selection"]]]
+
+
+class _Parser:
+    """只支持查询操作、变量、参数和嵌套选择集（足够覆盖插件发出的文档）"""
+
+    def __init__(self, source: str, variables: Dict[str, Any]):
+        self.tokens = [m.group("tok") for m in _TOKEN.finditer(source) if m.group("tok")]
+        self.pos = 0
+        self.variables = variables
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected: Optional[str] = None) -> str:
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise GraphQLSyntaxError(f"Expected {expected or 'token'}, got {token}")
+        self.pos += 1
+        return token
+
+    def document(self) -> List[Selection]:
+        if self.peek() in ("query", "mutation", "subscription"):
+            if self.take() != "query":
+                raise GraphQLSyntaxError("Only queries are supported")
+            if self.peek() not in ("{", "("):
+                self.take()
+            if self.peek() == "(":
+                # 变量声明只用于校验，这里跳过
+                while self.take() != ")":
+                    pass
+        selections = self.selection_set()
+        if self.peek() is not None:
+            raise GraphQLSyntaxError(f"Unexpected token {self.peek()}")
+        return selections
+
+    def selection_set(self) -> List[Selection]:
+        self.take("{")
+        selections = []
+        while self.peek() != "}":
+            selections.append(self.selection())
+        self.take("}")
+        return selections
+
+    def selection(self) -> Selection:
+        alias = name = self.take()
+        if self.peek() == ":":
+            self.take()
+            name = self.take()
+        args = {}
+        if self.peek() == "(":
+            self.take()
+            while self.peek() != ")":
+                arg = self.take()
+                self.take(":")
+                args[arg] = self.value()
+            self.take(")")
+        children = self.selection_set() if self.peek() == "{" else None
+        return alias, name, args, children
+
+    def value(self) -> Any:
+        token = self.take()
+        if token == "$":
+            return self.variables.get(self.take())
+        if token.startswith('"'):
+            return json.loads(token)
+        if token in ("true", "false", "null"):
+            return {"true": True, "false": False, "null": None}[token]
+        if re.match(r"-?\d", token):
+            return float(token) if "." in token else int(token)
+        return token  # 枚举值
+
+
+def project(value: Any, selections: Optional[List[Selection]]) -> Any:
+    """按选择集裁剪数据"""
+    if selections is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, selections) for item in value]
+    return {alias: project(value.get(name), children) for alias, name, _, children in selections}
+
+
+# ---------------------------------------------------------------- 数据
+
+def synthetic_player(username: str, player_uuid: Optional[str] = None) -> Dict[str, Any]:
+    """由用户名确定性地生成一个完整的玩家"""
+    seed = int.from_bytes(hashlib.sha1(username.lower().encode()).digest()[:8], "big")
+    rng = random.Random(seed)
+    if player_uuid is None:
+        player_uuid = str(uuid_lib.UUID(bytes=hashlib.md5(username.lower().encode()).digest(), version=3))
+
+    def game(extra: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # 约 20% 的玩家没有玩过某个游戏
+        if rng.random() < 0.2:
+            return None
+        played = rng.randint(1, 3000)
+        stats = {
+            "wins": rng.randint(0, played),
+            "played": played,
+            "playtime": played * rng.randint(120, 900)
+        }
+        for key, kind in extra.items():
+            if kind == "count":
+                stats[key] = rng.randint(0, played * 4)
+            elif kind == "time":
+                stats[key] = rng.randint(15_000, 400_000)
+            elif kind == "sub":
+                stats[key] = rng.randint(0, played)
+        return stats
+
+    combat = {"kills": "count", "deaths": "count"}
+    total_played = rng.randint(50, 20_000)
+    fish = rng.randint(0, 5000)
+    first_login = datetime(2022, 6, 1, tzinfo=timezone.utc) + timedelta(days=rng.randint(0, 900))
+    return {
+        "uuid": player_uuid,
+        "username": username,
+        "ranks": rng.sample(["CHAMP", "GRAND_CHAMP", "GRAND_CHAMP_ROYALE", "CREATOR", "CONTESTANT"], rng.randint(0, 2)),
+        "mccPlusStatus": {"active": True, "tier": rng.choice(["PLUS", "PLUS_PLUS"])} if rng.random() < 0.3 else None,
+        "crownLevel": {"level": rng.randint(1, 150), "progress": round(rng.random(), 3)},
+        "status": {
+            "firstLogin": first_login.isoformat(),
+            "lastLogin": (first_login + timedelta(days=rng.randint(0, 300))).isoformat(),
+            "online": rng.random() < 0.1
+        },
+        "collections": {
+            "currency": rng.randint(0, 2_000_000),
+            "cosmetics": rng.randint(0, 600),
+            "trophies": rng.randint(0, 4000)
+        },
+        "social": {"friends": rng.randint(0, 300), "party": None},
+        "statistics": {
+            "global": {
+                "wins": rng.randint(0, total_played),
+                "played": total_played,
+                "playtime": total_played * rng.randint(120, 900)
+            },
+            "parkourWarrior": game({"completions": "sub", "fastestCompletion": "time"}),
+            "skyBattle": game(combat),
+            "tgttos": game({"finishes": "sub", "fastestCompletion": "time"}),
+            "hitw": game({"qualifications": "sub", "fastestCompletion": "time"}),
+            "battleBox": game(combat),
+            "dynaball": game(combat),
+            "rocketSpleef": game(combat),
+            "fishing": {
+                "total": fish,
+                "treasure": fish // 20,
+                "fish": fish - fish // 20 - fish // 10,
+                "junk": fish // 10
+            } if fish else None
+        }
+    }
+
+
+class PlayerDirectory:
+    """玩家数据来源：先查夹具，再按需生成"""
+
+    def __init__(self, fixtures: List[Dict[str, Any]], synthetic: bool = True):
+        self.synthetic = synthetic
+        self._by_uuid: Dict[str, Dict[str, Any]] = {}
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        for player in fixtures:
+            self._add(player)
+
+    @classmethod
+    def from_file(cls, path: Optional[str], synthetic: bool = True) -> "PlayerDirectory":
+        fixtures = []
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                fixtures = json.load(f)
+        return cls(fixtures, synthetic)
+
+    def _add(self, player: Dict[str, Any]) -> Dict[str, Any]:
+        self._by_uuid[player["uuid"].lower()] = player
+        self._by_name[player["username"].lower()] = player
+        return player
+
+    def by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        name = (username or "").lower()
+        player = self._by_name.get(name)
+        if player is None and self.synthetic and name and not name.startswith(NOT_FOUND_PREFIX):
+            player = self._add(synthetic_player(username))
+        return player
+
+    def by_uuid(self, player_uuid: str) -> Optional[Dict[str, Any]]:
+        key = (player_uuid or "").lower()
+        player = self._by_uuid.get(key)
+        if player is None and self.synthetic and len(key) == 36:
+            player = self._add(synthetic_player(f"P_{key.replace('-', '')[:10]}", key))
+        return player
+
+    def __len__(self) -> int:
+        return len(self._by_uuid)
+
+
+def next_rotation(rotation: str) -> str:
+    """下次轮换时间（UTC）"""
+    now = datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    if rotation == "WEEKLY":
+        midnight += timedelta(days=(7 - midnight.weekday()) % 7)
+    return midnight.isoformat()
+
+
+# ---------------------------------------------------------------- 服务
+
+@dataclass
+class StandInConfig:
+    """替身服务行为配置"""
+    latency: str = "fixed:0"
+    error_rate: float = 0.0          # 返回 503 的比例
+    rate_limit_rate: float = 0.0     # 返回 429 的比例
+    retry_after: float = 1.0         # 429 的 Retry-After 秒数
+    graphql_error_rate: float = 0.0  # 根字段返回 GraphQL 错误的比例
+    api_key: Optional[str] = None    # 设置后要求 X-API-Key 匹配，否则返回 401
+    seed: Optional[int] = None
+    fixtures: Optional[str] = DEFAULT_FIXTURES
+    synthetic: bool = True
+
+
+@dataclass
+class StandInStats:
+    requests: int = 0
+    root_fields: int = 0
+    status: Counter = field(default_factory=Counter)
+    fields: Counter = field(default_factory=Counter)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "root_fields": self.root_fields,
+            "status": dict(self.status),
+            "fields": dict(self.fields)
+        }
+
+
+class StandInServer:
+    """可嵌入基准测试的替身服务"""
+
+    def __init__(self, config: Optional[StandInConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StandInConfig()
+        self.host = host
+        self.port = port
+        self.rng = random.Random(self.config.seed)
+        self.latency = parse_latency(self.config.latency)
+        self.players = PlayerDirectory.from_file(self.config.fixtures, self.config.synthetic)
+        self.stats = StandInStats()
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/graphql"
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/graphql", self.handle_graphql)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    async def start(self) -> "StandInServer":
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        # port=0 时取系统分配的端口
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "StandInServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def _respond(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> web.Response:
+        self.stats.status[status] += 1
+        return web.json_response(body, status=status, headers=headers)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats.as_dict())
+
+    async def handle_graphql(self, request: web.Request) -> web.Response:
+        self.stats.requests += 1
+        body = await request.read()
+        await asyncio.sleep(self.latency(self.rng))
+
+        config = self.config
+        if config.api_key is not None and request.headers.get("X-API-Key") != config.api_key:
+            return self._respond(401, {"errors": [{"message": "Invalid API key"}]})
+        if self.rng.random() < config.rate_limit_rate:
+            return self._respond(429, {"errors": [{"message": "Too many requests"}]},
+                                 {"Retry-After": str(config.retry_after)})
+        if self.rng.random() < config.error_rate:
+            return self._respond(503, {"errors": [{"message": "Service unavailable"}]})
+
+        try:
+            payload = json.loads(body)
+            selections = _Parser(payload["query"], payload.get("variables") or {}).document()
+        except (ValueError, KeyError, TypeError, GraphQLSyntaxError) as e:
+            return self._respond(400, {"errors": [{"message": f"Invalid request: {e}"}]})
+
+        data, errors = {}, []
+        for alias, name, args, children in selections:
+            self.stats.root_fields += 1
+            self.stats.fields[name] += 1
+            if self.rng.random() < config.graphql_error_rate:
+                data[alias] = None
+                errors.append({"message": "Injected resolver error", "path": [alias]})
+                continue
+            if name == "player":
+                data[alias] = project(self.players.by_uuid(args.get("uuid")), children)
+            elif name == "playerByUsername":
+                data[alias] = project(self.players.by_username(args.get("username")), children)
+            elif name == "nextRotation":
+                data[alias] = next_rotation(args.get("rotation", "DAILY"))
+            else:
+                data[alias] = None
+                errors.append({"message": f"Cannot query field \"{name}\" on type \"Query\"", "path": [alias]})
+
+        result: Dict[str, Any] = {"data": data}
+        if errors:
+            result["errors"] = errors
+        return self._respond(200, result)
+
+
+async def serve(server: StandInServer) -> None:
+    await server.start()
+    print(f"Stand-in GraphQL server listening on {server.url} "
+          f"({len(server.players)} fixture players, latency={server.config.latency})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", default="fixed:0", help="延迟分布，例如 lognormal:40:0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--graphql-error-rate", type=float, default=0.0)
+    parser.add_argument("--api-key", default=None, help="要求请求携带此 X-API-Key")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--no-synthetic", action="store_true", help="只返回夹具中的玩家")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        graphql_error_rate=args.graphql_error_rate,
+        api_key=args.api_key,
+        seed=args.seed,
+        fixtures=args.fixtures,
+        synthetic=not args.no_synthetic
+    )
+    try:
+        asyncio.run(serve(StandInServer(config, args.host, args.port)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()